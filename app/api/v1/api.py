@@ -3,14 +3,21 @@
 该模块设置主API路由，并包含所有子路由（如认证和聊天机器人功能的路由）。
 """
 
-from fastapi import APIRouter
+from fastapi import (
+    APIRouter,
+    Response,
+)
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.auth import router as auth_router  # 导入认证路由
 from app.api.v1.chatbot import router as chatbot_router  # 导入聊天机器人路由
 from app.core.logging import logger  # 导入日志记录器
 
-# 创建API路由实例
-api_router = APIRouter()
+# 创建API路由实例（统一使用orjson序列化响应）
+api_router = APIRouter(default_response_class=ORJSONResponse)
+
+# 健康检查响应体在模块加载时序列化一次，请求时直接返回常量字节
+_HEALTH_BODY = b'{"status":"healthy","version":"1.0.0"}'
 
 # 包含子路由
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])  # 添加认证路由，前缀为/auth
@@ -25,4 +32,5 @@ async def health_check():
         dict: 包含健康状态和版本信息的字典.
     """
     logger.info("health_check_called")  # 记录健康检查被调用的日志
-    return {"status": "healthy", "version": "1.0.0"}  # 返回健康状态和版本信息
\ No newline at end of file
+    # 返回预序列化的健康状态字节，跳过整个Pydantic/JSON序列化管线
+    return Response(content=_HEALTH_BODY, media_type="application/json")
\ No newline at end of file
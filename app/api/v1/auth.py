@@ -3,8 +3,10 @@
 本模块提供用户注册、登录、会话管理和令牌验证等端点
 """
 
+import asyncio
+import re
 import uuid
-from typing import List
+from typing import Tuple
 
 from fastapi import (
     APIRouter,  # FastAPI路由组件
@@ -13,14 +15,17 @@ from fastapi import (
     HTTPException,  # HTTP异常处理
     Request,    # 请求对象
 )
+from fastapi.responses import ORJSONResponse  # orjson序列化的JSON响应
 from fastapi.security import (
     HTTPAuthorizationCredentials,  # Bearer token认证凭证
     HTTPBearer,  # Bearer token认证方案
 )
 
 # 导入项目模块
-from app.core.config import settings  # 应用配置
-from app.core.limiter import limiter  # 请求限流器
+from app.core.limiter import (  # 请求限流器
+    limit_for,
+    limiter,
+)
 from app.core.logging import logger  # 日志记录
 from app.models.session import Session  # 会话模型
 from app.models.user import User  # 用户模型
@@ -30,10 +35,11 @@ from app.schemas.auth import (  # 数据模型
     UserCreate,
     UserResponse,
 )
-from app.services.database import DatabaseService  # 数据库服务
+from app.services.database import get_database_service  # 数据库服务（进程内共享单例，惰性构造）
 from app.utils.auth import (  # 认证工具
     create_access_token,  # 创建JWT令牌
-    verify_token,  # 验证令牌
+    create_access_tokens,  # 批量创建JWT令牌
+    verify_token,  # 验证令牌（带短TTL缓存）
 )
 from app.utils.sanitization import (  # 数据清洗工具
     sanitize_email,  # 邮箱清洗
@@ -41,10 +47,16 @@ from app.utils.sanitization import (  # 数据清洗工具
     validate_password_strength,  # 密码强度验证
 )
 
-# 初始化路由和依赖项
-router = APIRouter()
+# 数据库服务（首次访问时构造引擎，导入时不触碰数据库）
+db_service = get_database_service()
+
+# 初始化路由和依赖项（统一使用orjson序列化响应）
+router = APIRouter(default_response_class=ORJSONResponse)
 security = HTTPBearer()  # Bearer token认证方案
-db_service = DatabaseService()  # 数据库服务实例
+
+# 会话ID的UUID形状校验（模块加载时编译一次）
+# 会话ID来自签名已验证的JWT，只需廉价的形状校验而非完整清洗
+_SESSION_ID_RE = re.compile(r"^[0-9a-fA-F-]{36}$")
 
 
 async def get_current_user(
@@ -65,7 +77,7 @@ async def get_current_user(
         # 清洗令牌防止注入攻击
         token = sanitize_string(credentials.credentials)
 
-        # 验证令牌有效性
+        # 验证令牌有效性（重复出现的令牌命中缓存，无需重新验证签名）
         user_id = verify_token(token)
         if user_id is None:
             logger.error("invalid_token", token_part=token[:10] + "...")
@@ -75,8 +87,8 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # 检查用户是否存在
-        user_id_int = int(user_id)
+        # 检查用户是否存在（缓存命中时user_id已是int，无需再转换）
+        user_id_int = user_id if isinstance(user_id, int) else int(user_id)
         user = await db_service.get_user(user_id_int)
         if user is None:
             logger.error("user_not_found", user_id=user_id_int)
@@ -114,7 +126,7 @@ async def get_current_session(
         # 清洗令牌
         token = sanitize_string(credentials.credentials)
 
-        # 验证令牌获取会话ID
+        # 验证令牌获取会话ID（重复出现的令牌命中缓存，无需重新验证签名）
         session_id = verify_token(token)
         if session_id is None:
             logger.error("session_id_not_found", token_part=token[:10] + "...")
@@ -124,8 +136,16 @@ async def get_current_session(
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # 二次清洗会话ID
-        session_id = sanitize_string(session_id)
+        # 会话ID由已验证签名的JWT解码而来，廉价的UUID形状校验即可
+        # （数字主题是用户令牌而非会话令牌，同样在此拒绝）
+        if not isinstance(session_id, str) or _SESSION_ID_RE.fullmatch(session_id) is None:
+            # 数字主题是int，先转字符串再截断
+            logger.error("session_id_invalid_format", session_id=str(session_id)[:10])
+            raise HTTPException(
+                status_code=404,
+                detail="会话不存在",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
 
         # 检查会话是否存在
         session = await db_service.get_session(session_id)
@@ -147,8 +167,67 @@ async def get_current_session(
         )
 
 
-@router.post("/register", response_model=UserResponse)  # 用户注册端点
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["register"][0])  # 注册限流
+async def get_current_session_and_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Tuple[Session, User]:
+    """从令牌中获取当前会话及其所属用户（单次联表查询）
+
+    参数:
+        credentials: 包含JWT令牌的HTTP认证凭证
+
+    返回:
+        Tuple[Session, User]: 从令牌中提取的会话及其所属用户
+
+    异常:
+        HTTPException: 令牌无效或缺失时抛出
+    """
+    try:
+        # 清洗令牌
+        token = sanitize_string(credentials.credentials)
+
+        # 验证令牌获取会话ID（重复出现的令牌命中缓存）
+        session_id = verify_token(token)
+        if session_id is None:
+            logger.error("session_id_not_found", token_part=token[:10] + "...")
+            raise HTTPException(
+                status_code=401,
+                detail="无效的认证凭证",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # 会话ID由已验证签名的JWT解码而来，廉价的UUID形状校验即可
+        # （数字主题是用户令牌而非会话令牌，同样在此拒绝）
+        if not isinstance(session_id, str) or _SESSION_ID_RE.fullmatch(session_id) is None:
+            # 数字主题是int，先转字符串再截断
+            logger.error("session_id_invalid_format", session_id=str(session_id)[:10])
+            raise HTTPException(
+                status_code=404,
+                detail="会话不存在",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # 单次联表查询同时获取会话和用户，避免下游再次查询
+        row = await db_service.get_session_with_user(session_id)
+        if row is None:
+            logger.error("session_not_found", session_id=session_id)
+            raise HTTPException(
+                status_code=404,
+                detail="会话不存在",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        return row
+    except ValueError as ve:
+        logger.error("token_validation_failed", error=str(ve), exc_info=True)
+        raise HTTPException(
+            status_code=422,
+            detail="无效的令牌格式",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.post("/register")  # 用户注册端点（出站模型已在本地构造并校验，省去response_model二次校验）
+@limiter.limit(limit_for("register"))  # 注册限流
 async def register_user(request: Request, user_data: UserCreate):
     """注册新用户
     
@@ -170,31 +249,36 @@ async def register_user(request: Request, user_data: UserCreate):
         password = user_data.password.get_secret_value()
         validate_password_strength(password)
 
-        # 检查邮箱是否已注册
-        if await db_service.get_user_by_email(sanitized_email):
+        # 邮箱唯一性查询与bcrypt哈希相互独立：并发执行使总延迟约等于
+        # 两者中较慢的一个，且to_thread将bcrypt移出事件循环，避免阻塞其他请求
+        existing, hashed_password = await asyncio.gather(
+            db_service.get_user_by_email(sanitized_email),
+            asyncio.to_thread(User.hash_password, password),
+        )
+        if existing:
             raise HTTPException(status_code=400, detail="邮箱已被注册")
 
         # 创建用户
         user = await db_service.create_user(
             email=sanitized_email,
-            password=User.hash_password(password)  # 密码哈希存储
+            password=hashed_password  # 密码哈希存储
         )
 
         # 生成访问令牌
-        token = create_access_token(str(user.id))
+        token = create_access_token(user.id)
 
         return UserResponse(
             id=user.id,
             email=user.email,
             token=token
-        )
+        ).model_dump()
     except ValueError as ve:
         logger.error("user_registration_validation_failed", error=str(ve), exc_info=True)
         raise HTTPException(status_code=422, detail=str(ve))
 
 
-@router.post("/login", response_model=TokenResponse)  # 用户登录端点
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["login"][0])  # 登录限流
+@router.post("/login")  # 用户登录端点
+@limiter.limit(limit_for("login"))  # 登录限流
 async def login(
     request: Request,
     username: str = Form(...),  # 表单格式的用户名
@@ -230,7 +314,16 @@ async def login(
 
         # 验证用户凭证
         user = await db_service.get_user_by_email(username)
-        if not user or not user.verify_password(password):
+        if not user:
+            # 对未知邮箱执行一次等时的bcrypt校验，
+            # 防止通过响应时间探测邮箱是否已注册
+            User.verify_password_dummy(password)
+            raise HTTPException(
+                status_code=401,
+                detail="邮箱或密码错误",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if not user.verify_password(password):
             raise HTTPException(
                 status_code=401,
                 detail="邮箱或密码错误",
@@ -238,18 +331,18 @@ async def login(
             )
 
         # 生成访问令牌
-        token = create_access_token(str(user.id))
+        token = create_access_token(user.id)
         return TokenResponse(
             access_token=token.access_token,
             token_type="bearer",  # Bearer token类型
             expires_at=token.expires_at  # 过期时间
-        )
+        ).model_dump()
     except ValueError as ve:
         logger.error("login_validation_failed", error=str(ve), exc_info=True)
         raise HTTPException(status_code=422, detail=str(ve))
 
 
-@router.post("/session", response_model=SessionResponse)  # 创建会话端点
+@router.post("/session")  # 创建会话端点
 async def create_session(user: User = Depends(get_current_user)):
     """为认证用户创建新会话
     
@@ -282,13 +375,13 @@ async def create_session(user: User = Depends(get_current_user)):
             session_id=session_id,
             name=session.name,
             token=token
-        )
+        ).model_dump()
     except ValueError as ve:
         logger.error("session_creation_validation_failed", error=str(ve), user_id=user.id, exc_info=True)
         raise HTTPException(status_code=422, detail=str(ve))
 
 
-@router.patch("/session/{session_id}/name", response_model=SessionResponse)  # 更新会话名称端点
+@router.patch("/session/{session_id}/name")  # 更新会话名称端点
 async def update_session_name(
     session_id: str,  # 路径参数:会话ID
     name: str = Form(...),  # 表单格式的新名称
@@ -308,13 +401,12 @@ async def update_session_name(
         HTTPException: 更新失败时抛出
     """
     try:
-        # 输入清洗
+        # 输入清洗（current_session.id 来自数据库，无需再次清洗）
         sanitized_session_id = sanitize_string(session_id)
         sanitized_name = sanitize_string(name)
-        sanitized_current_session = sanitize_string(current_session.id)
 
         # 验证会话所有权
-        if sanitized_session_id != sanitized_current_session:
+        if sanitized_session_id != current_session.id:
             raise HTTPException(status_code=403, detail="不能修改其他用户的会话")
 
         # 更新会话名称
@@ -327,13 +419,13 @@ async def update_session_name(
             session_id=sanitized_session_id,
             name=session.name,
             token=token
-        )
+        ).model_dump()
     except ValueError as ve:
         logger.error("session_update_validation_failed", error=str(ve), session_id=session_id, exc_info=True)
         raise HTTPException(status_code=422, detail=str(ve))
 
 
-@router.get("/sessions", response_model=List[SessionResponse])  # 获取用户会话列表端点
+@router.get("/sessions")  # 获取用户会话列表端点
 async def get_user_sessions(user: User = Depends(get_current_user)):
     """获取认证用户的所有会话
     
@@ -346,15 +438,17 @@ async def get_user_sessions(user: User = Depends(get_current_user)):
     try:
         # 从数据库获取用户会话
         sessions = await db_service.get_user_sessions(user.id)
-        
-        # 构造响应列表
+
+        # 批量签发令牌（共享时钟读取和声明模板）；
+        # 会话ID和名称来自数据库，无需逐条清洗
+        tokens = create_access_tokens([session.id for session in sessions])
         return [
             SessionResponse(
-                session_id=sanitize_string(session.id),
-                name=sanitize_string(session.name),
-                token=create_access_token(session.id),
-            )
-            for session in sessions
+                session_id=session.id,
+                name=session.name,
+                token=token,
+            ).model_dump()
+            for session, token in zip(sessions, tokens)
         ]
     except ValueError as ve:
         logger.error("get_sessions_validation_failed", user_id=user.id, error=str(ve), exc_info=True)
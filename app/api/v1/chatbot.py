@@ -7,8 +7,8 @@
 - 聊天记录清除
 """
 
-import json
-from typing import List
+import asyncio
+from typing import Tuple
 
 from fastapi import (
     APIRouter,  # FastAPI路由组件
@@ -16,40 +16,78 @@ from fastapi import (
     HTTPException,  # HTTP异常处理
     Request,    # 请求对象
 )
-from fastapi.responses import StreamingResponse  # 流式响应
+from fastapi.responses import (  # 响应类型
+    ORJSONResponse,  # orjson序列化的JSON响应
+    StreamingResponse,  # 流式响应
+)
+from fastapi.security import HTTPAuthorizationCredentials  # Bearer token认证凭证
+
+import orjson  # C实现的JSON编码器（SSE热路径）
 
-from app.api.v1.auth import get_current_session  # 获取当前会话
+from app.api.v1.auth import (  # 认证依赖项
+    get_current_session_and_user,  # 获取当前会话及所属用户（单次联表查询）
+    security,  # Bearer token认证方案
+)
 from app.core.config import settings  # 应用配置
-from app.core.langgraph.graph import LangGraphAgent  # 语言图代理(核心聊天逻辑)
-from app.core.limiter import limiter  # 限流器
 from app.core.logging import logger  # 日志记录
+from app.core.redis_token_bucket import token_bucket  # 跨worker共享的令牌桶限流
 from app.models.session import Session  # 会话模型
-from app.schemas.chat import (  # 数据模型
-    ChatRequest,
-    ChatResponse,
-    Message,
-    StreamResponse,
-)
+from app.models.user import User  # 用户模型
+from app.schemas.chat import ChatRequest  # 数据模型
+from app.utils import dump_messages  # 消息批量转字典
+
+# 创建路由实例（统一使用orjson序列化响应）
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# SSE帧的常量片段（预编码为bytes，流式热路径上零额外编码开销）
+_SSE_HEAD = b"data: "
+_SSE_TAIL = b"\n\n"
+_SSE_FINAL = b'data: {"content":"","done":true}\n\n'
+
+# 流式请求并发上限：长时间的LLM流不应占满数据库连接池，
+# 保留一半池容量给非流式请求；超出时快速返回429而非排队耗尽连接
+_stream_semaphore = asyncio.Semaphore(max(1, settings.POSTGRES_POOL_SIZE // 2))
+
+# 语言图代理在应用lifespan中创建并挂载到 app.state.agent，
+# 路由处理器通过 request.app.state.agent 访问共享实例
+
+
+async def _session_with_prefetch(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Tuple[Session, User]:
+    """解析会话及用户的同时并发预热代理图
+
+    会话查询与图的预热是相互独立的IO，用asyncio.gather并发执行
+    以重叠两者的往返延迟（图已就绪时预热近乎零开销）。
 
-# 创建路由实例
-router = APIRouter()
-# 初始化语言图代理
-agent = LangGraphAgent()
+    参数:
+        request: FastAPI请求对象（用于访问共享代理实例）
+        credentials: 包含JWT令牌的HTTP认证凭证
+
+    返回:
+        Tuple[Session, User]: 当前会话及其所属用户
+    """
+    session_user, _ = await asyncio.gather(
+        get_current_session_and_user(credentials),
+        request.app.state.agent.prefetch_context(),
+    )
+    return session_user
 
 
-@router.post("/chat", response_model=ChatResponse)  # 定义POST端点，指定响应模型
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["chat"][0])  # 应用限流规则
+@router.post("/chat")  # 定义POST端点（出站数据为服务端自产，跳过response_model二次校验）
 async def chat(
-    request: Request,  # FastAPI请求对象(用于限流)
+    request: Request,  # FastAPI请求对象
     chat_request: ChatRequest,  # 聊天请求数据
-    session: Session = Depends(get_current_session),  # 通过依赖注入获取当前会话
+    session_user: Tuple[Session, User] = Depends(_session_with_prefetch),  # 会话及用户查询与图预热并发执行
+    _rate_limit: None = Depends(token_bucket("chat")),  # Redis令牌桶限流（跨worker共享）
 ):
     """处理常规聊天请求
     
     参数:
         request: FastAPI请求对象(用于限流)
         chat_request: 包含消息内容的聊天请求
-        session: 从认证令牌获取的当前会话
+        session_user: 从认证令牌获取的当前会话及其所属用户
         
     返回:
         ChatResponse: 处理后的聊天响应
@@ -57,6 +95,8 @@ async def chat(
     异常:
         HTTPException: 如果请求处理出错则抛出500异常
     """
+    session, _user = session_user
+    agent = request.app.state.agent
     try:
         # 记录接收到的请求日志
         logger.info(
@@ -72,7 +112,8 @@ async def chat(
         logger.info("chat_request_processed", session_id=session.id)
 
         # 返回处理结果
-        return ChatResponse(messages=result)
+        # 直接返回字典，由ORJSONResponse序列化，省去ChatResponse构造和二次校验
+        return {"messages": dump_messages(result)}
     except Exception as e:
         # 记录错误日志并抛出异常
         logger.error("chat_request_failed", session_id=session.id, error=str(e), exc_info=True)
@@ -80,18 +121,18 @@ async def chat(
 
 
 @router.post("/chat/stream")  # 流式聊天端点
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["chat_stream"][0])  # 应用限流
 async def chat_stream(
     request: Request,
     chat_request: ChatRequest,
-    session: Session = Depends(get_current_session),
+    session_user: Tuple[Session, User] = Depends(_session_with_prefetch),  # 会话及用户查询与图预热并发执行
+    _rate_limit: None = Depends(token_bucket("chat_stream")),  # Redis令牌桶限流（跨worker共享）
 ):
     """处理流式聊天请求
     
     参数:
         request: FastAPI请求对象(用于限流)
         chat_request: 包含消息内容的聊天请求
-        session: 当前会话
+        session_user: 当前会话及其所属用户
         
     返回:
         StreamingResponse: 流式响应对象
@@ -99,6 +140,13 @@ async def chat_stream(
     异常:
         HTTPException: 处理出错时抛出500异常
     """
+    session, _user = session_user
+    agent = request.app.state.agent
+
+    # 并发流已满时立即拒绝，避免新流排队占用请求连接
+    if _stream_semaphore.locked():
+        raise HTTPException(status_code=429, detail="流式请求并发已达上限，请稍后重试")
+
     try:
         # 记录流式请求接收日志
         logger.info(
@@ -116,33 +164,33 @@ async def chat_stream(
             异常:
                 如果流式处理过程中出错，会生成错误事件
             """
-            try:
-                full_response = ""
-                # 异步获取流式响应
-                async for chunk in agent.get_stream_response(
-                    chat_request.messages, session.id, user_id=session.user_id
-                ):
-                    full_response += chunk
-                    # 构造流式响应对象
-                    response = StreamResponse(content=chunk, done=False)
-                    # 生成SSE格式数据
-                    yield f"data: {json.dumps(response.model_dump())}\n\n"
-
-                # 发送完成事件
-                final_response = StreamResponse(content="", done=True)
-                yield f"data: {json.dumps(final_response.model_dump())}\n\n"
-
-            except Exception as e:
-                # 记录流式处理错误
-                logger.error(
-                    "stream_chat_request_failed",
-                    session_id=session.id,
-                    error=str(e),
-                    exc_info=True,
-                )
-                # 生成错误事件
-                error_response = StreamResponse(content=str(e), done=True)
-                yield f"data: {json.dumps(error_response.model_dump())}\n\n"
+            # 信号量限制同时进行的流数量，防止长流耗尽连接池
+            async with _stream_semaphore:
+                try:
+                    full_response = ""
+                    # 异步获取流式响应
+                    # 热路径：每个数据块直接用orjson编码为字节，跳过Pydantic实例化
+                    # 和stdlib json，Starlette将字节原样传给ASGI，无额外编码开销
+                    async for chunk in agent.get_stream_response(
+                        chat_request.messages, session.id, user_id=session.user_id
+                    ):
+                        full_response += chunk
+                        # 生成SSE格式数据（字节）
+                        yield _SSE_HEAD + orjson.dumps({"content": chunk, "done": False}) + _SSE_TAIL
+
+                    # 发送完成事件
+                    yield _SSE_FINAL
+
+                except Exception as e:
+                    # 记录流式处理错误
+                    logger.error(
+                        "stream_chat_request_failed",
+                        session_id=session.id,
+                        error=str(e),
+                        exc_info=True,
+                    )
+                    # 生成错误事件（字节）
+                    yield _SSE_HEAD + orjson.dumps({"content": str(e), "done": True}) + _SSE_TAIL
 
         # 返回流式响应
         return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -158,17 +206,17 @@ async def chat_stream(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/messages", response_model=ChatResponse)  # 获取消息历史端点
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["messages"][0])  # 限流
+@router.get("/messages")  # 获取消息历史端点（出站数据为服务端自产，跳过response_model二次校验）
 async def get_session_messages(
     request: Request,
-    session: Session = Depends(get_current_session),
+    session_user: Tuple[Session, User] = Depends(get_current_session_and_user),
+    _rate_limit: None = Depends(token_bucket("messages")),  # Redis令牌桶限流（跨worker共享）
 ):
     """获取会话的所有消息
     
     参数:
         request: FastAPI请求对象
-        session: 当前会话
+        session_user: 当前会话及其所属用户
         
     返回:
         ChatResponse: 包含所有消息的响应
@@ -176,10 +224,13 @@ async def get_session_messages(
     异常:
         HTTPException: 获取失败时抛出500异常
     """
+    session, _user = session_user
+    agent = request.app.state.agent
     try:
-        # 从代理获取聊天历史
+        # 从代理获取聊天历史；服务端自产数据直接用orjson序列化，
+        # 跳过ChatResponse构造和response_model的二次校验
         messages = await agent.get_chat_history(session.id)
-        return ChatResponse(messages=messages)
+        return ORJSONResponse(content={"messages": dump_messages(messages)})
     except Exception as e:
         # 记录错误日志
         logger.error("get_messages_failed", session_id=session.id, error=str(e), exc_info=True)
@@ -187,16 +238,16 @@ async def get_session_messages(
 
 
 @router.delete("/messages")  # 清除聊天历史端点
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["messages"][0])  # 限流
 async def clear_chat_history(
     request: Request,
-    session: Session = Depends(get_current_session),
+    session_user: Tuple[Session, User] = Depends(get_current_session_and_user),
+    _rate_limit: None = Depends(token_bucket("messages")),  # Redis令牌桶限流（跨worker共享）
 ):
     """清除会话的所有消息
     
     参数:
         request: FastAPI请求对象
-        session: 当前会话
+        session_user: 当前会话及其所属用户
         
     返回:
         dict: 包含操作结果的字典
@@ -204,6 +255,8 @@ async def clear_chat_history(
     异常:
         HTTPException: 清除失败时抛出500异常
     """
+    session, _user = session_user
+    agent = request.app.state.agent
     try:
         # 调用代理清除历史
         await agent.clear_chat_history(session.id)
@@ -8,6 +8,7 @@ import json
 import os
 from enum import Enum
 from pathlib import Path
+from types import MappingProxyType
 from typing import (
     Any,
     Dict,
@@ -61,20 +62,30 @@ def load_env_file():
     print(f"Loading environment: {env}")
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
-    # Define env files in priority order
-    env_files = [
-        os.path.join(base_dir, f".env.{env.value}.local"),
-        os.path.join(base_dir, f".env.{env.value}"),
-        os.path.join(base_dir, ".env.local"),
-        os.path.join(base_dir, ".env"),
-    ]
-
-    # Load the first env file that exists
-    for env_file in env_files:
-        if os.path.isfile(env_file):
-            load_dotenv(dotenv_path=env_file)
-            print(f"Loaded environment from {env_file}")
-            return env_file
+    # Candidate file names mapped to their priority (lower wins)
+    candidates = {
+        f".env.{env.value}.local": 0,
+        f".env.{env.value}": 1,
+        ".env.local": 2,
+        ".env": 3,
+    }
+
+    # One directory scan instead of one stat call per candidate
+    best = None
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                priority = candidates.get(entry.name)
+                if priority is not None and entry.is_file() and (best is None or priority < best[0]):
+                    best = (priority, entry.path)
+    except OSError:
+        return None
+
+    if best is not None:
+        env_file = best[1]
+        load_dotenv(dotenv_path=env_file)
+        print(f"Loaded environment from {env_file}")
+        return env_file
 
     # Fall back to default if no env file found
     return None
@@ -83,13 +94,13 @@ def load_env_file():
 ENV_FILE = load_env_file()
 
 
-# Parse list values from environment variables
-def parse_list_from_env(env_key, default=None):
-    """Parse a comma-separated list from an environment variable."""
-    value = os.getenv(env_key)
-    if not value:
-        return default or []
+# List-valued environment keys: one exact key plus one prefix family
+_LIST_ENV_KEYS = frozenset({"ALLOWED_ORIGINS", "RATE_LIMIT_DEFAULT"})
+_LIST_ENV_PREFIX = "RATE_LIMIT_"
+
 
+def _parse_list_value(value):
+    """Parse a comma-separated string into a list of stripped items."""
     # Remove quotes if they exist
     value = value.strip("\"'")
     # Handle single value case
@@ -99,6 +110,29 @@ def parse_list_from_env(env_key, default=None):
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
+def _scan_env_lists():
+    """Collect all list-valued settings from os.environ in a single pass.
+
+    Walking os.environ once and parsing every matching key up front avoids
+    one full environment lookup per setting in ``Settings.__init__``.
+    """
+    parsed = {}
+    for key, value in os.environ.items():
+        if value and (key in _LIST_ENV_KEYS or key.startswith(_LIST_ENV_PREFIX)):
+            parsed[key] = _parse_list_value(value)
+    return parsed
+
+
+# Parse list values from environment variables
+def parse_list_from_env(env_key, default=None):
+    """Parse a comma-separated list from an environment variable."""
+    value = os.getenv(env_key)
+    if not value:
+        return default or []
+
+    return _parse_list_value(value)
+
+
 # Parse dict of lists from environment variables with prefix
 def parse_dict_of_lists_from_env(prefix, default_dict=None):
     """Parse dictionary of lists from environment variables with a common prefix."""
@@ -110,15 +144,41 @@ def parse_dict_of_lists_from_env(prefix, default_dict=None):
             endpoint = key[len(prefix) :].lower()  # Extract endpoint name
             # Parse the values for this endpoint
             if value:
-                value = value.strip("\"'")
-                if "," in value:
-                    result[endpoint] = [item.strip() for item in value.split(",") if item.strip()]
-                else:
-                    result[endpoint] = [value]
+                result[endpoint] = _parse_list_value(value)
 
     return result
 
 
+# 各环境的默认覆盖设置（模块级只读常量，避免每次实例化Settings时重建字典）
+_ENV_SETTINGS = MappingProxyType(
+    {
+        Environment.DEVELOPMENT: {  # 开发环境设置
+            "DEBUG": True,
+            "LOG_LEVEL": "DEBUG",
+            "LOG_FORMAT": "console",
+            "RATE_LIMIT_DEFAULT": ["1000 per day", "200 per hour"],
+        },
+        Environment.STAGING: {  # 预发布环境设置
+            "DEBUG": False,
+            "LOG_LEVEL": "INFO",
+            "RATE_LIMIT_DEFAULT": ["500 per day", "100 per hour"],
+        },
+        Environment.PRODUCTION: {  # 生产环境设置
+            "DEBUG": False,
+            "LOG_LEVEL": "WARNING",
+            "RATE_LIMIT_DEFAULT": ["200 per day", "50 per hour"],
+            "DB_AUTO_CREATE": False,  # 生产环境由迁移工具负责建表
+        },
+        Environment.TEST: {  # 测试环境设置
+            "DEBUG": True,
+            "LOG_LEVEL": "DEBUG",
+            "LOG_FORMAT": "console",
+            "RATE_LIMIT_DEFAULT": ["1000 per day", "1000 per hour"],  # 测试环境放宽限制
+        },
+    }
+)
+
+
 class Settings:
     """应用程序设置类（不使用pydantic）。"""
 
@@ -132,6 +192,9 @@ class Settings:
         # 设置环境
         self.ENVIRONMENT = get_environment()
 
+        # 一次性扫描环境变量中所有列表类型的配置（见 _scan_env_lists）
+        env_lists = _scan_env_lists()
+
         # 应用程序基本设置
         self.PROJECT_NAME = os.getenv("PROJECT_NAME", "FastAPI LangGraph Template")  # 项目名称
         self.VERSION = os.getenv("VERSION", "1.0.0")  # 版本号
@@ -142,7 +205,7 @@ class Settings:
         self.DEBUG = os.getenv("DEBUG", "false").lower() in ("true", "1", "t", "yes")  # 调试模式开关
 
         # CORS（跨域资源共享）设置
-        self.ALLOWED_ORIGINS = parse_list_from_env("ALLOWED_ORIGINS", ["*"])  # 允许的跨域来源
+        self.ALLOWED_ORIGINS = env_lists.get("ALLOWED_ORIGINS", ["*"])  # 允许的跨域来源
 
         # Langfuse配置（用于LLM应用监控和分析）
         self.LANGFUSE_PUBLIC_KEY = os.getenv("LANGFUSE_PUBLIC_KEY", "")  # Langfuse公钥
@@ -166,14 +229,23 @@ class Settings:
         self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # 日志级别
         self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # 日志格式（json或console）
 
+        # Redis配置（用于跨worker共享的令牌桶限流，可选）
+        self.REDIS_URL = os.getenv("REDIS_URL", "")  # Redis连接URL（为空时禁用）
+
         # PostgreSQL数据库配置
         self.POSTGRES_URL = os.getenv("POSTGRES_URL", "")  # 数据库连接URL
+        # 启动时自动建表（生产环境默认关闭，应使用迁移工具）
+        self.DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "true").lower() in ("true", "1", "t", "yes")
+        # 注意：每个worker的总连接数 = POOL_SIZE + MAX_OVERFLOW，
+        # 需保持在Postgres的max_connections / worker数以内
         self.POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "20"))  # 连接池大小
-        self.POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", "10"))  # 最大溢出连接数
+        self.POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "5"))  # 连接池预热保持的最小连接数
+        self.POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))  # 等待可用连接的超时（秒）
+        self.POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", "30"))  # 最大溢出连接数
         self.CHECKPOINT_TABLES = ["checkpoint_blobs", "checkpoint_writes", "checkpoints"]  # 检查点相关表
 
         # 速率限制配置
-        self.RATE_LIMIT_DEFAULT = parse_list_from_env("RATE_LIMIT_DEFAULT", ["200 per day", "50 per hour"])  # 默认速率限制
+        self.RATE_LIMIT_DEFAULT = env_lists.get("RATE_LIMIT_DEFAULT", ["200 per day", "50 per hour"])  # 默认速率限制
 
         # 各端点的速率限制默认值
         default_endpoints = {
@@ -186,11 +258,10 @@ class Settings:
             "health": ["20 per minute"],  # 健康检查接口限制
         }
 
-        # 从环境变量更新速率限制端点配置
+        # 从已扫描的环境变量更新速率限制端点配置
         self.RATE_LIMIT_ENDPOINTS = default_endpoints.copy()
         for endpoint in default_endpoints:
-            env_key = f"RATE_LIMIT_{endpoint.upper()}"
-            value = parse_list_from_env(env_key)
+            value = env_lists.get(f"RATE_LIMIT_{endpoint.upper()}")
             if value:
                 self.RATE_LIMIT_ENDPOINTS[endpoint] = value
 
@@ -205,39 +276,17 @@ class Settings:
 
     def apply_environment_settings(self):
         """根据当前环境应用环境特定的设置。"""
-        env_settings = {
-            Environment.DEVELOPMENT: {  # 开发环境设置
-                "DEBUG": True,
-                "LOG_LEVEL": "DEBUG",
-                "LOG_FORMAT": "console",
-                "RATE_LIMIT_DEFAULT": ["1000 per day", "200 per hour"],
-            },
-            Environment.STAGING: {  # 预发布环境设置
-                "DEBUG": False,
-                "LOG_LEVEL": "INFO",
-                "RATE_LIMIT_DEFAULT": ["500 per day", "100 per hour"],
-            },
-            Environment.PRODUCTION: {  # 生产环境设置
-                "DEBUG": False,
-                "LOG_LEVEL": "WARNING",
-                "RATE_LIMIT_DEFAULT": ["200 per day", "50 per hour"],
-            },
-            Environment.TEST: {  # 测试环境设置
-                "DEBUG": True,
-                "LOG_LEVEL": "DEBUG",
-                "LOG_FORMAT": "console",
-                "RATE_LIMIT_DEFAULT": ["1000 per day", "1000 per hour"],  # 测试环境放宽限制
-            },
-        }
+        # 获取当前环境的设置（模块级常量_ENV_SETTINGS）
+        current_env_settings = _ENV_SETTINGS.get(self.ENVIRONMENT, {})
 
-        # 获取当前环境的设置
-        current_env_settings = env_settings.get(self.ENVIRONMENT, {})
+        # 对环境变量键做一次快照，避免在循环中重复读取os.environ
+        env_keys = frozenset(os.environ)
 
         # 如果环境变量中没有明确设置，则应用默认设置
         for key, value in current_env_settings.items():
             env_var_name = key.upper()
             # 仅当环境变量未明确设置时才覆盖
-            if env_var_name not in os.environ:
+            if env_var_name not in env_keys:
                 setattr(self, key, value)
 
 
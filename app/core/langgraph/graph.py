@@ -1,5 +1,8 @@
 """这个文件包含了 LangGraph Agent/工作流以及与 LLM 的交互。"""
 
+import asyncio
+import random
+from functools import lru_cache
 from typing import (
     Any,
     AsyncGenerator,
@@ -8,7 +11,7 @@ from typing import (
     Optional,
 )
 
-from asgiref.sync import sync_to_async
+import httpx
 from langchain_core.messages import (
     BaseMessage,
     ToolMessage,
@@ -39,9 +42,43 @@ from app.schemas import (
 )
 from app.utils import (
     dump_messages,
+    dump_mixed_messages,
     prepare_messages,
 )
 
+# 历史消息过滤保留的角色（frozenset避免每条消息重建列表并线性扫描）
+_KEEP_ROLES: frozenset[str] = frozenset(("assistant", "user"))
+
+# BaseMessage层面的保留类型，对应上面的OpenAI角色
+_KEEP_MESSAGE_TYPES: frozenset[str] = frozenset(("human", "ai"))
+
+# 检查点表的DELETE语句（模块导入时构造一次，避免每次调用的f-string格式化）
+_CLEAR_HISTORY_STATEMENTS = tuple(
+    f"DELETE FROM {table} WHERE thread_id = %s" for table in settings.CHECKPOINT_TABLES
+)
+
+
+@lru_cache(maxsize=1024)
+def _get_callback_handler(user_id: Optional[str], session_id: str) -> CallbackHandler:
+    """按(user_id, session_id)缓存Langfuse回调处理器。
+
+    CallbackHandler的初始化包含HTTP会话、认证和工作线程等非平凡开销，
+    同一会话的重复请求复用同一个处理器实例。
+
+    Args:
+        user_id: 用于Langfuse跟踪的用户ID。
+        session_id: 用于Langfuse跟踪的会话ID。
+
+    Returns:
+        CallbackHandler: 该会话对应的回调处理器。
+    """
+    return CallbackHandler(
+        environment=settings.ENVIRONMENT.value,
+        debug=False,
+        user_id=user_id,
+        session_id=session_id,
+    )
+
 
 class LangGraphAgent:
     """管理 LangGraph Agent/工作流以及与 LLM 的交互。
@@ -52,12 +89,22 @@ class LangGraphAgent:
 
     def __init__(self):
         """初始化 LangGraph Agent 及其必要组件。"""
+        # 共享的httpx异步客户端：复用连接（避免每请求TLS握手），
+        # 连接数上限与数据库连接池同阶，防止LLM调用占用过多套接字
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.POSTGRES_POOL_SIZE,
+                max_keepalive_connections=settings.POSTGRES_POOL_SIZE // 2,
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
         # 使用环境特定的 LLM 模型
         self.llm = ChatOpenAI(
             model=settings.LLM_MODEL,
             temperature=settings.DEFAULT_LLM_TEMPERATURE,
             api_key=settings.LLM_API_KEY,
             max_tokens=settings.MAX_TOKENS,
+            http_async_client=self._http_client,
             **self._get_model_kwargs(),
         ).bind_tools(tools)
         self.tools_by_name = {tool.name: tool for tool in tools}
@@ -86,6 +133,15 @@ class LangGraphAgent:
 
         return model_kwargs
 
+    @staticmethod
+    async def _configure_connection(conn) -> None:
+        """在连接加入池时禁用预备语句。
+
+        Args:
+            conn: 刚建立的psycopg异步连接。
+        """
+        conn.prepare_threshold = None
+
     async def _get_connection_pool(self) -> AsyncConnectionPool:
         """获取使用环境特定设置的 PostgreSQL 连接池。
 
@@ -100,7 +156,19 @@ class LangGraphAgent:
                 self._connection_pool = AsyncConnectionPool(
                     settings.POSTGRES_URL,
                     open=False,
+                    # min_size在启动时预热连接，首批并发检查点写入无需付出
+                    # TCP+TLS+认证握手延迟；max_idle/max_lifetime在Postgres
+                    # 主动断开空闲连接前轮换它们
+                    min_size=settings.POSTGRES_POOL_MIN_SIZE,
                     max_size=max_size,
+                    max_idle=300.0,
+                    max_lifetime=3600.0,
+                    reconnect_timeout=30.0,
+                    timeout=settings.POSTGRES_POOL_TIMEOUT,
+                    # configure在每个连接建立时执行一次，确保prepare_threshold=None
+                    # 作用于AsyncPostgresSaver使用的每个池内连接：
+                    # 既兼容PgBouncer事务池模式，也省去每条语句的Parse/Describe往返
+                    configure=self._configure_connection,
                     kwargs={
                         "autocommit": True,
                         "connect_timeout": 5,
@@ -108,6 +176,8 @@ class LangGraphAgent:
                     },
                 )
                 await self._connection_pool.open()
+                # 等待min_size个连接就绪，保证开始服务时连接池已预热
+                await self._connection_pool.wait()
                 logger.info("connection_pool_created", max_size=max_size, environment=settings.ENVIRONMENT.value)
             except Exception as e:
                 logger.error("connection_pool_creation_failed", error=str(e), environment=settings.ENVIRONMENT.value)
@@ -134,9 +204,13 @@ class LangGraphAgent:
         # 根据环境配置重试次数
         max_retries = settings.MAX_LLM_CALL_RETRIES
 
+        # 消息在重试之间不会变化，序列化一次即可
+        # （prepared列表混合schema与LangChain消息，走逐条转换路径）
+        dumped_messages = dump_mixed_messages(messages)
+
         for attempt in range(max_retries):
             try:
-                generated_state = {"messages": [await self.llm.ainvoke(dump_messages(messages))]}
+                generated_state = {"messages": [await self.llm.ainvoke(dumped_messages)]}
                 logger.info(
                     "llm_response_generated",
                     session_id=state.session_id,
@@ -156,6 +230,11 @@ class LangGraphAgent:
                 )
                 llm_calls_num += 1
 
+                # 客户端错误（除429限流外）重试不会成功，直接失败
+                status_code = getattr(e, "status_code", None)
+                if status_code is not None and 400 <= status_code < 500 and status_code != 429:
+                    raise e
+
                 # 在生产环境中，我们可能需要回退到更可靠的模型
                 if settings.ENVIRONMENT == Environment.PRODUCTION and attempt == max_retries - 2:
                     fallback_model = "gpt-4o"
@@ -164,6 +243,10 @@ class LangGraphAgent:
                     )
                     self.llm.model_name = fallback_model
 
+                # 指数退避加抖动，避免在限流高峰期间密集重试
+                # （最后一次尝试失败后直接抛出，不再白等退避时间）
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(min(0.2 * (2**attempt) + random.uniform(0, 0.2), 10))
                 continue
 
         raise Exception(f"在 {max_retries} 次尝试后未能从 LLM 获取响应")
@@ -177,9 +260,20 @@ class LangGraphAgent:
         Returns:
             Dict: 包含工具响应的更新消息。
         """
+        tool_calls = state.messages[-1].tool_calls
+
+        # 工具调用彼此独立且以I/O为主，并发执行使总耗时约等于最慢的一个；
+        # return_exceptions=True保证单个工具失败不会中断整批调用
+        results = await asyncio.gather(
+            *(self.tools_by_name[tool_call["name"]].ainvoke(tool_call["args"]) for tool_call in tool_calls),
+            return_exceptions=True,
+        )
+
         outputs = []
-        for tool_call in state.messages[-1].tool_calls:
-            tool_result = await self.tools_by_name[tool_call["name"]].ainvoke(tool_call["args"])
+        for tool_call, tool_result in zip(tool_calls, results):
+            if isinstance(tool_result, BaseException):
+                logger.error("tool_call_failed", tool_name=tool_call["name"], error=str(tool_result))
+                tool_result = f"工具调用失败: {tool_result}"
             outputs.append(
                 ToolMessage(
                     content=tool_result,
@@ -258,6 +352,32 @@ class LangGraphAgent:
 
         return self._graph
 
+    async def prefetch_context(self) -> None:
+        """预热代理的请求上下文。
+
+        确保图（及其底层连接池）已编译就绪。本方法与会话查询等独立IO
+        并发执行（asyncio.gather），以隐藏首次请求的初始化延迟；
+        图已就绪时近乎零开销。
+        """
+        if self._graph is None:
+            self._graph = await self.create_graph()
+
+    @staticmethod
+    def _build_config(session_id: str, user_id: Optional[str]) -> Dict[str, Any]:
+        """构造图调用配置（回调处理器来自LRU缓存）。
+
+        Args:
+            session_id: 会话ID。
+            user_id: 用户ID。
+
+        Returns:
+            Dict[str, Any]: 供ainvoke/astream使用的配置字典。
+        """
+        return {
+            "configurable": {"thread_id": session_id},
+            "callbacks": [_get_callback_handler(user_id, session_id)],
+        }
+
     async def get_response(
         self,
         messages: list[Message],
@@ -276,17 +396,7 @@ class LangGraphAgent:
         """
         if self._graph is None:
             self._graph = await self.create_graph()
-        config = {
-            "configurable": {"thread_id": session_id},
-            "callbacks": [
-                CallbackHandler(
-                    environment=settings.ENVIRONMENT.value,
-                    debug=False,
-                    user_id=user_id,
-                    session_id=session_id,
-                )
-            ],
-        }
+        config = self._build_config(session_id, user_id)
         try:
             response = await self._graph.ainvoke(
                 {"messages": dump_messages(messages), "session_id": session_id}, config
@@ -309,30 +419,37 @@ class LangGraphAgent:
         Yields:
             str: LLM 响应的令牌。
         """
-        config = {
-            "configurable": {"thread_id": session_id},
-            "callbacks": [
-                CallbackHandler(
-                    environment=settings.ENVIRONMENT.value, debug=False, user_id=user_id, session_id=session_id
-                )
-            ],
-        }
+        config = self._build_config(session_id, user_id)
         if self._graph is None:
             self._graph = await self.create_graph()
 
+        # 有界队列将LLM生产者与HTTP消费者解耦：慢客户端的背压由队列吸收，
+        # 令牌生成不会因下游写入缓慢而停滞；None为结束哨兵，异常原样入队重抛
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+
+        async def _pump() -> None:
+            try:
+                async for token, _ in self._graph.astream(
+                    {"messages": dump_messages(messages), "session_id": session_id}, config, stream_mode="messages"
+                ):
+                    await queue.put(token.content)
+                await queue.put(None)
+            except Exception as stream_error:
+                await queue.put(stream_error)
+
+        producer = asyncio.create_task(_pump())
         try:
-            async for token, _ in self._graph.astream(
-                {"messages": dump_messages(messages), "session_id": session_id}, config, stream_mode="messages"
-            ):
-                try:
-                    yield token.content
-                except Exception as token_error:
-                    logger.error("处理令牌时出错", error=str(token_error), session_id=session_id)
-                    # 即使当前令牌处理失败，也继续处理下一个
-                    continue
-        except Exception as stream_error:
-            logger.error("流处理时出错", error=str(stream_error), session_id=session_id)
-            raise stream_error
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    logger.error("流处理时出错", error=str(item), session_id=session_id)
+                    raise item
+                yield item
+        finally:
+            # 客户端断开时取消生产者，停止为不会被消费的令牌付费
+            producer.cancel()
 
     async def get_chat_history(self, session_id: str) -> list[Message]:
         """获取给定线程 ID 的聊天历史。
@@ -346,9 +463,8 @@ class LangGraphAgent:
         if self._graph is None:
             self._graph = await self.create_graph()
 
-        state: StateSnapshot = await sync_to_async(self._graph.get_state)(
-            config={"configurable": {"thread_id": session_id}}
-        )
+        # 使用编译图原生的异步API，避免sync_to_async的线程池上下文切换开销
+        state: StateSnapshot = await self._graph.aget_state(config={"configurable": {"thread_id": session_id}})
         return self.__process_messages(state.values["messages"]) if state.values else []
 
     def __process_messages(self, messages: list[BaseMessage]) -> list[Message]:
@@ -360,14 +476,31 @@ class LangGraphAgent:
         Returns:
             list[Message]: 处理后的消息列表，只包含助手和用户的消息。
         """
-        openai_style_messages = convert_to_openai_messages(messages)
-        # 只保留助手和用户的消息
+        # 先在BaseMessage层面按类型过滤再转换：工具/系统消息占比高时
+        # 省去对它们的整轮OpenAI格式转换；空历史直接返回
+        filtered = [m for m in messages if m.type in _KEEP_MESSAGE_TYPES and getattr(m, "content", None) is not None]
+        if not filtered:
+            return []
+        openai_style_messages = convert_to_openai_messages(filtered)
+        # 只保留助手和用户的消息；历史消息在入库前已通过校验，
+        # model_construct跳过重复的Pydantic校验开销
         return [
-            Message(**message)
+            Message.model_construct(**message)
             for message in openai_style_messages
-            if message["role"] in ["assistant", "user"] and message["content"]
+            if message["role"] in _KEEP_ROLES and message["content"]
         ]
 
+    async def close(self) -> None:
+        """关闭代理持有的共享资源（连接池与HTTP客户端）。
+
+        在应用关闭时调用，保证Postgres连接与LLM的keep-alive连接被干净释放。
+        """
+        if self._connection_pool is not None:
+            await self._connection_pool.close()
+            self._connection_pool = None
+        await self._http_client.aclose()
+        logger.info("agent_resources_closed")
+
     async def clear_chat_history(self, session_id: str) -> None:
         """清除给定线程 ID 的所有聊天历史。
 
@@ -382,14 +515,13 @@ class LangGraphAgent:
             conn_pool = await self._get_connection_pool()
 
             # 为此特定操作使用新连接
+            # 事务保证跨表删除的原子性；pipeline将所有DELETE合并为一次网络往返
             async with conn_pool.connection() as conn:
-                for table in settings.CHECKPOINT_TABLES:
-                    try:
-                        await conn.execute(f"DELETE FROM {table} WHERE thread_id = %s", (session_id,))
-                        logger.info(f"已清除会话 {session_id} 的 {table}")
-                    except Exception as e:
-                        logger.error(f"清除 {table} 时出错", error=str(e))
-                        raise
+                async with conn.transaction():
+                    async with conn.pipeline():
+                        for statement in _CLEAR_HISTORY_STATEMENTS:
+                            await conn.execute(statement, (session_id,))
+                logger.info("chat_history_cleared", session_id=session_id, tables=len(_CLEAR_HISTORY_STATEMENTS))
 
         except Exception as e:
             logger.error("清除聊天历史失败", error=str(e))
@@ -5,11 +5,38 @@
 """
 
 # 导入必要的模块
+from functools import lru_cache
+
+import slowapi.wrappers
+from limits import parse_many  # 限流字符串解析器
 from slowapi import Limiter  # 导入限流器类
 from slowapi.util import get_remote_address  # 导入获取远程地址的工具函数
 
 from app.core.config import settings  # 导入应用配置
 
+# SlowAPI在每个请求上都会通过LimitGroup重新解析限流字符串（"30 per minute"），
+# 为parse_many加上memoization后，每个唯一的字符串只解析一次
+_parse_many_cached = lru_cache(maxsize=None)(parse_many)
+slowapi.wrappers.parse_many = _parse_many_cached
+
+# 启动时为每个端点预解析限流配置，预热缓存
+PARSED_LIMITS = {
+    endpoint: _parse_many_cached(values[0]) for endpoint, values in settings.RATE_LIMIT_ENDPOINTS.items()
+}
+
+
+def limit_for(endpoint: str) -> str:
+    """返回端点对应的限流字符串（解析结果已在启动时预热缓存）。
+
+    Args:
+        endpoint: RATE_LIMIT_ENDPOINTS 中的端点名
+
+    Returns:
+        str: 该端点的限流配置字符串
+    """
+    return settings.RATE_LIMIT_ENDPOINTS[endpoint][0]
+
+
 # 初始化限流器
 # key_func=get_remote_address: 使用客户端IP地址作为限流的键
 # default_limits=settings.RATE_LIMIT_DEFAULT: 使用配置文件中设置的默认限流规则
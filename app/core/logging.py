@@ -8,14 +8,20 @@ console-friendly development logging and JSON-formatted production logging.
 import json
 import logging
 import sys
+from contextvars import (
+    ContextVar,
+    Token,
+)
 from datetime import datetime
 from pathlib import Path
 from typing import (
     Any,
     Dict,
     List,
+    Optional,
 )
 
+import orjson
 import structlog
 
 from app.core.config import (
@@ -75,6 +81,81 @@ class JsonlFileHandler(logging.Handler):
         super().close()
 
 
+class _RequestLogBuffer:
+    """Per-request buffer of info-level events, flushed as one emit.
+
+    BaseHTTPMiddleware runs the downstream app in a separate task whose
+    context copy keeps referencing this buffer after the middleware has
+    flushed it, e.g. while a StreamingResponse body is still being
+    produced. The shared ``closed`` flag makes the accumulator pass such
+    late events through individually instead of silently discarding them.
+    """
+
+    __slots__ = ("events", "closed")
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self.closed = False
+
+
+# Per-request accumulator: info-level events are collected here and flushed
+# as a single structured emit per request by the metrics middleware.
+_request_log_events: ContextVar[Optional[_RequestLogBuffer]] = ContextVar("request_log_events", default=None)
+
+
+def start_request_log() -> Token:
+    """Start collecting info-level log events for the current request.
+
+    Returns:
+        Token: Context token to pass back to flush_request_log.
+    """
+    return _request_log_events.set(_RequestLogBuffer())
+
+
+def flush_request_log(token: Token, **fields: Any) -> None:
+    """Emit the collected events as one structured log entry.
+
+    Closes the buffer first, so events logged after the response has been
+    returned (streaming bodies) are emitted individually rather than
+    appended to an already-flushed buffer and lost.
+
+    Args:
+        token: The context token returned by start_request_log.
+        **fields: Request-level fields (method, path, status, duration, ...).
+    """
+    buffer = _request_log_events.get()
+    _request_log_events.reset(token)
+    if buffer is not None:
+        buffer.closed = True
+        events = buffer.events
+    else:
+        events = None
+    if events:
+        logger.info("request_completed", events=events, **fields)
+    else:
+        logger.info("request_completed", **fields)
+
+
+def _accumulate_request_events(logger_: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect info events while a request log is active instead of emitting them.
+
+    Warnings and errors always pass through immediately, as do info events
+    logged after the buffer has been flushed (e.g. during streaming-response
+    body production).
+    """
+    if method_name == "info":
+        buffer = _request_log_events.get()
+        if buffer is not None and not buffer.closed:
+            buffer.events.append(event_dict)
+            raise structlog.DropEvent
+    return event_dict
+
+
+def _orjson_serializer(obj: Any, **kwargs: Any) -> str:
+    """Serialize log entries with orjson (C implementation) instead of stdlib json."""
+    return orjson.dumps(obj, default=str).decode()
+
+
 def get_structlog_processors(include_file_info: bool = True) -> List[Any]:
     """Get the structlog processors based on configuration.
 
@@ -87,6 +168,7 @@ def get_structlog_processors(include_file_info: bool = True) -> List[Any]:
     # Set up processors that are common to both outputs
     processors = [
         structlog.stdlib.filter_by_level,
+        _accumulate_request_events,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
@@ -161,7 +243,7 @@ def setup_logging() -> None:
         structlog.configure(
             processors=[
                 *shared_processors,
-                structlog.processors.JSONRenderer(),
+                structlog.processors.JSONRenderer(serializer=_orjson_serializer),
             ],
             wrapper_class=structlog.stdlib.BoundLogger,
             logger_factory=structlog.stdlib.LoggerFactory(),
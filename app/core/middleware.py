@@ -1,12 +1,17 @@
 """用于跟踪指标和其他横切关注点的自定义中间件。"""
 
 import time
+from functools import lru_cache
 from typing import Callable
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
+from app.core.logging import (
+    flush_request_log,  # 请求结束时合并输出日志
+    start_request_log,  # 开始收集请求内日志事件
+)
 from app.core.metrics import (
     http_requests_total,  # HTTP请求总数计数器
     http_request_duration_seconds,  # HTTP请求持续时间指标
@@ -14,6 +19,20 @@ from app.core.metrics import (
 )
 
 
+# 缓存带标签的Prometheus子指标：labels()每次都要做字典查找与哈希，
+# 按标签元组缓存子指标后热路径上只剩一次lru_cache查找
+@lru_cache(maxsize=1024)
+def _request_counter(method: str, endpoint: str, status: int):
+    """按(方法, 端点, 状态码)缓存请求计数器子指标。"""
+    return http_requests_total.labels(method=method, endpoint=endpoint, status=status)
+
+
+@lru_cache(maxsize=1024)
+def _duration_histogram(method: str, endpoint: str):
+    """按(方法, 端点)缓存请求耗时直方图子指标。"""
+    return http_request_duration_seconds.labels(method=method, endpoint=endpoint)
+
+
 class MetricsMiddleware(BaseHTTPMiddleware):
     """用于跟踪HTTP请求指标的中间件。
     
@@ -33,8 +52,11 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         Returns:
             Response: 应用程序的响应对象
         """
-        # 记录请求开始时间
-        start_time = time.time()
+        # 记录请求开始时间（单调时钟：不受NTP校时影响，不会产生负耗时）
+        start_time = time.perf_counter()
+
+        # 开始收集本请求内的info级日志事件，请求结束时合并为单条输出
+        log_token = start_request_log()
 
         try:
             # 调用下一个中间件或路由处理函数
@@ -46,14 +68,29 @@ class MetricsMiddleware(BaseHTTPMiddleware):
             raise
         finally:
             # 计算请求处理时间
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
+
+            # 使用匹配到的路由模板（如/sessions/{session_id}）作为端点标签，
+            # 避免每个UUID生成一条时间序列导致Prometheus基数失控；
+            # 未匹配任何路由（404等）时退回原始路径，该路径不含查询串
+            route = request.scope.get("route")
+            endpoint = getattr(route, "path", None) or request.url.path
 
             # 记录请求总数指标
             # 包含请求方法、端点路径和状态码标签
-            http_requests_total.labels(method=request.method, endpoint=request.url.path, status=status_code).inc()
+            _request_counter(request.method, endpoint, status_code).inc()
 
             # 记录请求处理时间指标
             # 包含请求方法和端点路径标签
-            http_request_duration_seconds.labels(method=request.method, endpoint=request.url.path).observe(duration)
+            _duration_histogram(request.method, endpoint).observe(duration)
+
+            # 将请求内收集到的日志事件合并为单条结构化日志输出
+            flush_request_log(
+                log_token,
+                method=request.method,
+                path=endpoint,
+                status_code=status_code,
+                duration_ms=round(duration * 1000, 2),
+            )
 
         return response
@@ -0,0 +1,168 @@
+"""基于Redis Lua脚本的分布式令牌桶限流器。
+
+SlowAPI将计数器保存在进程内存中，在多个uvicorn worker下每个worker各自计数，
+实际限流阈值会被放大N倍。此模块把高流量端点的限流检查移到Redis：
+补充令牌、扣减、写回在一个Lua脚本中原子完成，所有worker共享同一个桶，
+每次请求只需一次Redis往返。
+
+未配置 ``REDIS_URL`` 时限流检查直接放行；此时 ``app/main.py`` 会注册
+``SlowAPIMiddleware``，由SlowAPI的默认限流兜底，因此该模块在开发环境中是可选的。
+配置了Redis但运行时Redis故障的情况选择放行（fail open），而非拒绝所有请求。
+"""
+
+import re
+import time
+from typing import Optional
+
+from fastapi import (
+    HTTPException,
+    Request,
+)
+from slowapi.util import get_remote_address
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis是可选依赖
+    redis = None
+
+# 令牌桶Lua脚本：读取、按时间差补充令牌、扣减、写回，单次往返内原子完成
+_TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local refill_per_sec = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + (now - ts) * refill_per_sec)
+
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / refill_per_sec * 1000))
+return allowed
+"""
+
+# 解析限流配置字符串，兼容limits/SlowAPI的全部写法：
+# "30 per minute"、"30/minute"，以及带倍数周期的 "30 per 5 minutes"、"100/5minutes"
+_RATE_RE = re.compile(r"(\d+)\s*(?:per|/)\s*(\d+)?\s*(second|minute|hour|day)s?")
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# 所有令牌桶共享的Redis客户端（懒初始化）
+_redis_client: Optional["redis.Redis"] = None
+_unavailable_logged = False
+
+
+def parse_rate(limit_value: str) -> tuple[int, float]:
+    """将限流配置字符串解析为（容量，每秒补充速率）。
+
+    Args:
+        limit_value: 限流配置字符串，如 "30 per minute" 或 "30 per 5 minutes"。
+
+    Returns:
+        tuple[int, float]: 桶容量和每秒补充的令牌数。
+
+    Raises:
+        ValueError: 如果配置字符串无法解析。
+    """
+    match = _RATE_RE.match(limit_value.strip())
+    if match is None:
+        raise ValueError(f"无法解析限流配置: {limit_value!r}")
+    count = int(match.group(1))
+    multiplier = int(match.group(2)) if match.group(2) else 1
+    period = multiplier * _PERIOD_SECONDS[match.group(3)]
+    return count, count / period
+
+
+def _get_redis_client() -> Optional["redis.Redis"]:
+    """获取共享的Redis客户端，未配置或不可用时返回None。"""
+    global _redis_client, _unavailable_logged
+    if _redis_client is None:
+        if redis is None or not settings.REDIS_URL:
+            if not _unavailable_logged:
+                logger.warning("token_bucket_redis_unavailable", redis_url_configured=bool(settings.REDIS_URL))
+                _unavailable_logged = True
+            return None
+        _redis_client = redis.from_url(settings.REDIS_URL)
+        logger.info("token_bucket_redis_connected", redis_url=settings.REDIS_URL)
+    return _redis_client
+
+
+class TokenBucket:
+    """单个端点的令牌桶限流依赖项。
+
+    以客户端IP+端点名为键，在Redis中维护一个共享令牌桶。
+    作为FastAPI依赖项使用：超出限额时抛出429。
+    """
+
+    def __init__(self, endpoint: str, capacity: int, refill_per_sec: float):
+        """初始化令牌桶。
+
+        Args:
+            endpoint: 端点名（用于构造Redis键）。
+            capacity: 桶容量（突发上限）。
+            refill_per_sec: 每秒补充的令牌数（稳态速率）。
+        """
+        self.endpoint = endpoint
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._script = None
+
+    async def __call__(self, request: Request) -> None:
+        """检查并消耗一个令牌，超出限额时抛出429。
+
+        Args:
+            request: 传入的HTTP请求（用于提取客户端IP）。
+
+        Raises:
+            HTTPException: 令牌耗尽时抛出429。
+        """
+        client = _get_redis_client()
+        if client is None:
+            # Redis不可用时放行，由SlowAPI默认限流兜底
+            return
+
+        if self._script is None:
+            self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+        key = f"token_bucket:{self.endpoint}:{get_remote_address(request)}"
+        try:
+            allowed = await self._script(keys=[key], args=[self.capacity, self.refill_per_sec, time.time()])
+        except Exception as e:
+            # Redis故障时放行而不是拒绝所有请求
+            logger.error("token_bucket_check_failed", endpoint=self.endpoint, error=str(e))
+            return
+
+        if not allowed:
+            logger.warning("rate_limit_exceeded", endpoint=self.endpoint)
+            raise HTTPException(status_code=429, detail="请求过于频繁，请稍后再试")
+
+
+def token_bucket(endpoint: str) -> TokenBucket:
+    """按端点的限流配置构造令牌桶依赖项。
+
+    容量和补充速率从 ``settings.RATE_LIMIT_ENDPOINTS`` 解析，
+    例如 "30 per minute" 对应容量30、每秒补充0.5个令牌。
+
+    Args:
+        endpoint: ``RATE_LIMIT_ENDPOINTS`` 中的端点名。
+
+    Returns:
+        TokenBucket: 可用于 ``Depends(...)`` 的限流依赖项。
+    """
+    capacity, refill_per_sec = parse_rate(settings.RATE_LIMIT_ENDPOINTS[endpoint][0])
+    return TokenBucket(endpoint, capacity, refill_per_sec)
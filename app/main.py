@@ -1,6 +1,8 @@
 """这是应用程序的主入口文件。"""
 
+import asyncio
 import os
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import (
@@ -16,22 +18,59 @@ from fastapi import (
 )
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+)
 from langfuse import Langfuse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from slowapi.middleware import SlowAPIMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.core.limiter import limiter
+from app.core.langgraph.graph import LangGraphAgent
+from app.core.limiter import (
+    limit_for,
+    limiter,
+)
 from app.core.logging import logger
 from app.core.metrics import setup_metrics
 from app.core.middleware import MetricsMiddleware
-from app.services.database import database_service
+from app.services.database import get_database_service
 
 # 加载环境变量
 load_dotenv()
 
+# 数据库健康检查的短TTL缓存：k8s探针以秒级频率抓取/health，
+# 缓存2秒内的结果避免每次探测都产生一次数据库往返
+_DB_HEALTH_TTL = 2.0
+_db_health_cache: tuple[float, bool] = (0.0, False)
+_db_health_lock = asyncio.Lock()
+
+
+async def _check_db_health() -> bool:
+    """返回数据库健康状态，结果缓存_DB_HEALTH_TTL秒。
+
+    Returns:
+        bool: 数据库是否健康。
+    """
+    global _db_health_cache
+    checked_at, healthy = _db_health_cache
+    now = time.monotonic()
+    if now - checked_at < _DB_HEALTH_TTL:
+        return healthy
+    async with _db_health_lock:
+        # 等锁期间其他请求可能已刷新缓存
+        checked_at, healthy = _db_health_cache
+        now = time.monotonic()
+        if now - checked_at < _DB_HEALTH_TTL:
+            return healthy
+        healthy = await get_database_service().health_check()
+        _db_health_cache = (time.monotonic(), healthy)
+        return healthy
+
+
 # 初始化 Langfuse（用于 LLM 应用监控和分析）
 langfuse = Langfuse(
     public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
@@ -43,10 +82,28 @@ langfuse = Langfuse(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """处理应用程序的启动和关闭事件。
-    
+
+    在接收流量之前创建共享的单例（数据库服务、LangGraph代理）并挂载到
+    app.state，同时并发预热两者，避免首个请求承担冷启动延迟。
+
     Args:
         app: FastAPI 应用实例
     """
+    # 共享单例挂载到 app.state，路由处理器通过 request.app.state 访问
+    database_service = get_database_service()
+    app.state.db_service = database_service
+    app.state.agent = LangGraphAgent()
+
+    # 建表需在接收流量前完成（异步引擎下DDL不能在__init__中执行）；
+    # 生产环境默认关闭，由迁移工具负责模式变更
+    if settings.DB_AUTO_CREATE:
+        await database_service.create_tables()
+
+    # 并发预热：数据库连接与代理图编译互相独立
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(app.state.agent.prefetch_context())
+        tg.create_task(database_service.health_check())
+
     logger.info(
         "application_startup",
         project_name=settings.PROJECT_NAME,
@@ -54,6 +111,8 @@ async def lifespan(app: FastAPI):
         api_prefix=settings.API_V1_STR,
     )
     yield
+    # 关闭时释放代理持有的连接池与HTTP客户端
+    await app.state.agent.close()
     logger.info("application_shutdown")
 
 
@@ -63,6 +122,7 @@ app = FastAPI(
     version=settings.VERSION,
     description=settings.DESCRIPTION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,  # 全局使用orjson序列化响应
     lifespan=lifespan,
 )
 
@@ -76,6 +136,12 @@ app.add_middleware(MetricsMiddleware)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# 未配置Redis时没有共享令牌桶，注册SlowAPI中间件让默认限流对
+# chat/chat_stream/messages等无装饰器端点兜底
+# （带@limiter.limit装饰器的端点由装饰器计数，中间件会跳过，不会重复计数）
+if not settings.REDIS_URL:
+    app.add_middleware(SlowAPIMiddleware)
+
 
 # 添加请求验证异常处理器
 @app.exception_handler(RequestValidationError)
@@ -123,7 +189,7 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
 @app.get("/")
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["root"][0])
+@limiter.limit(limit_for("root"))
 async def root(request: Request):
     """根端点，返回基本的 API 信息。
     
@@ -145,7 +211,7 @@ async def root(request: Request):
 
 
 @app.get("/health")
-@limiter.limit(settings.RATE_LIMIT_ENDPOINTS["health"][0])
+@limiter.limit(limit_for("health"))
 async def health_check(request: Request) -> Dict[str, Any]:
     """健康检查端点，返回环境特定的信息。
 
@@ -162,8 +228,8 @@ async def health_check(request: Request) -> Dict[str, Any]:
     """
     logger.info("health_check_called")
 
-    # 检查数据库连接状态
-    db_healthy = await database_service.health_check()
+    # 检查数据库连接状态（短TTL缓存，见_check_db_health）
+    db_healthy = await _check_db_health()
 
     response = {
         "status": "healthy" if db_healthy else "degraded",
@@ -5,6 +5,7 @@ from typing import (
     List,
 )
 
+from sqlalchemy import Index
 from sqlmodel import (
     Field,
     Relationship,
@@ -28,6 +29,10 @@ class Session(BaseModel, table=True):
         user: Relationship to the session owner
     """
 
+    # 复合索引覆盖get_user_sessions的过滤加排序（user_id过滤、created_at排序），
+    # 使其成为索引范围扫描而非顺序扫描加排序
+    __table_args__ = (Index("ix_session_user_created", "user_id", "created_at"),)
+
     id: str = Field(primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     name: str = Field(default="")
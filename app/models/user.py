@@ -37,6 +37,16 @@ class User(BaseModel, table=True):
         """Verify if the provided password matches the hash."""
         return bcrypt.checkpw(password.encode("utf-8"), self.hashed_password.encode("utf-8"))
 
+    @staticmethod
+    def verify_password_dummy(password: str) -> bool:
+        """Run a bcrypt verification against a fixed dummy hash.
+
+        Called on login attempts for unknown emails so the request takes the
+        same time as a real verification, preventing attackers from probing
+        which emails exist via response timing.
+        """
+        return bcrypt.checkpw(password.encode("utf-8"), _DUMMY_PASSWORD_HASH)
+
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password using bcrypt."""
@@ -44,5 +54,8 @@ class User(BaseModel, table=True):
         return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
+# Fixed dummy hash computed once at startup for timing-equalized login failures
+_DUMMY_PASSWORD_HASH = bcrypt.hashpw(b"dummy-password-for-timing", bcrypt.gensalt())
+
 # Avoid circular imports
 from app.models.session import Session  # noqa: E402
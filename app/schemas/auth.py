@@ -5,12 +5,21 @@ from datetime import datetime
 
 from pydantic import (
     BaseModel,
+    ConfigDict,
     EmailStr,
     Field,
     SecretStr,
     field_validator,
 )
 
+# Pre-compiled validator patterns (module scope, compiled once at import)
+# 预编译的校验正则（模块级，导入时编译一次）
+_NAME_SANITIZE = re.compile(r'[<>{}[\]()\'"`]')
+
+# Accepted special characters for passwords (frozenset for O(1) membership)
+# 密码允许的特殊字符（frozenset提供O(1)成员判断）
+_PASSWORD_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>')
+
 
 class Token(BaseModel):
     """Token model for authentication.
@@ -22,6 +31,8 @@ class Token(BaseModel):
         expires_at: The token expiration timestamp. 令牌过期时间戳
     """
 
+    model_config = ConfigDict(frozen=True)
+
     access_token: str = Field(..., description="The JWT access token")  # JWT访问令牌
     token_type: str = Field(default="bearer", description="The type of token")  # 令牌类型
     expires_at: datetime = Field(..., description="The token expiration timestamp")  # 令牌过期时间戳
@@ -37,6 +48,8 @@ class TokenResponse(BaseModel):
         expires_at: When the token expires 令牌过期时间
     """
 
+    model_config = ConfigDict(frozen=True)
+
     access_token: str = Field(..., description="The JWT access token")  # JWT访问令牌
     token_type: str = Field(default="bearer", description="The type of token")  # 令牌类型
     expires_at: datetime = Field(..., description="When the token expires")  # 令牌过期时间
@@ -51,6 +64,8 @@ class UserCreate(BaseModel):
         password: User's password 用户的密码
     """
 
+    model_config = ConfigDict(frozen=True)
+
     email: EmailStr = Field(..., description="User's email address")  # 用户的电子邮件地址
     password: SecretStr = Field(..., description="User's password", min_length=8, max_length=64)  # 用户的密码
 
@@ -76,16 +91,33 @@ class UserCreate(BaseModel):
         if len(password) < 8:
             raise ValueError("Password must be at least 8 characters long")  # 密码长度必须至少为8个字符
 
-        if not re.search(r"[A-Z]", password):
+        # Single pass over the string instead of one regex scan per character
+        # class; short-circuits as soon as all four classes are seen
+        # 单次遍历字符串，取代每个字符类一次的正则扫描；
+        # 四类字符齐备后立即短路退出
+        has_upper = has_lower = has_digit = has_special = False
+        for c in password:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+            elif c in _PASSWORD_SPECIALS:
+                has_special = True
+            if has_upper and has_lower and has_digit and has_special:
+                break
+
+        if not has_upper:
             raise ValueError("Password must contain at least one uppercase letter")  # 密码必须包含至少一个大写字母
 
-        if not re.search(r"[a-z]", password):
+        if not has_lower:
             raise ValueError("Password must contain at least one lowercase letter")  # 密码必须包含至少一个小写字母
 
-        if not re.search(r"[0-9]", password):
+        if not has_digit:
             raise ValueError("Password must contain at least one number")  # 密码必须包含至少一个数字
 
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        if not has_special:
             raise ValueError("Password must contain at least one special character")  # 密码必须包含至少一个特殊字符
 
         return v
@@ -101,6 +133,8 @@ class UserResponse(BaseModel):
         token: Authentication token 认证令牌
     """
 
+    model_config = ConfigDict(frozen=True)
+
     id: int = Field(..., description="User's ID")  # 用户ID
     email: str = Field(..., description="User's email address")  # 用户的电子邮件地址
     token: Token = Field(..., description="Authentication token")  # 认证令牌
@@ -116,6 +150,8 @@ class SessionResponse(BaseModel):
         token: The authentication token for the session 会话的认证令牌
     """
 
+    model_config = ConfigDict(frozen=True)
+
     session_id: str = Field(..., description="The unique identifier for the chat session")  # 聊天会话的唯一标识符
     name: str = Field(default="", description="Name of the session", max_length=100)  # 会话名称
     token: Token = Field(..., description="The authentication token for the session")  # 会话的认证令牌
@@ -134,5 +170,5 @@ class SessionResponse(BaseModel):
         """
         # Remove any potentially harmful characters
         # 移除任何潜在的有害字符
-        sanitized = re.sub(r'[<>{}[\]()\'"`]', "", v)
+        sanitized = _NAME_SANITIZE.sub("", v)
         return sanitized
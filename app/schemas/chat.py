@@ -8,10 +8,14 @@ from typing import (
 
 from pydantic import (
     BaseModel,
+    ConfigDict,
     Field,
     field_validator,
 )
 
+# 预编译的内容校验正则（模块级，导入时编译一次）
+_SCRIPT = re.compile(r"<script.*?>.*?</script>", re.IGNORECASE | re.DOTALL)
+
 
 class Message(BaseModel):
     """消息模型，用于聊天端点。
@@ -21,7 +25,8 @@ class Message(BaseModel):
         content: 消息内容。
     """
 
-    model_config = {"extra": "ignore"}
+    # frozen跳过__setattr__簿记；消息一经校验便不可变
+    model_config = ConfigDict(extra="ignore", frozen=True)
 
     role: Literal["user", "assistant", "system"] = Field(..., description="消息发送者的角色")
     content: str = Field(..., description="消息内容", min_length=1, max_length=3000)
@@ -41,7 +46,7 @@ class Message(BaseModel):
             ValueError: 如果内容包含不允许的模式
         """
         # 检查潜在有害内容
-        if re.search(r"<script.*?>.*?</script>", v, re.IGNORECASE | re.DOTALL):
+        if _SCRIPT.search(v):
             raise ValueError("内容包含潜在有害的脚本标签")
 
         # 检查空字节
@@ -58,6 +63,8 @@ class ChatRequest(BaseModel):
         messages: 对话中的消息列表。
     """
 
+    model_config = ConfigDict(frozen=True)
+
     messages: List[Message] = Field(
         ...,
         description="对话中的消息列表",
@@ -72,6 +79,8 @@ class ChatResponse(BaseModel):
         messages: 对话中的消息列表。
     """
 
+    model_config = ConfigDict(frozen=True)
+
     messages: List[Message] = Field(..., description="对话中的消息列表")
 
 
@@ -83,5 +92,7 @@ class StreamResponse(BaseModel):
         done: 流是否完成。
     """
 
+    model_config = ConfigDict(frozen=True)
+
     content: str = Field(default="", description="当前数据块的内容")
     done: bool = Field(default=False, description="流是否完成")
@@ -12,6 +12,10 @@ from pydantic import (
     field_validator,
 )
 
+# Pre-compiled safe-pattern check for non-UUID session IDs
+# 预编译的非UUID会话ID安全模式校验
+_SESSION_ID = re.compile(r"^[a-zA-Z0-9_\-]+$")
+
 
 class GraphState(BaseModel):
     """State definition for the LangGraph Agent/Workflow."""
@@ -49,13 +53,14 @@ class GraphState(BaseModel):
         异常:
             ValueError: 如果会话ID无效
         """
-        # 尝试将其验证为UUID
+        # 先做廉价的安全字符检查（UUID是该模式的子集）；
+        # 命中即通过，避免在常见路径上构造uuid.UUID及其ValueError异常对象
+        if _SESSION_ID.match(v):
+            return v
+        # 包含连字符以外特殊字符的值只剩UUID一种合法形式
         try:
             uuid.UUID(v)
             return v
         except ValueError:
-            # 如果不是UUID，检查是否只包含安全字符
-            if not re.match(r"^[a-zA-Z0-9_\-]+$", v):
-                raise ValueError("Session ID must contain only alphanumeric characters, underscores, and hyphens")
-                # 会话ID必须只包含字母数字字符、下划线和连字符
-            return v
+            raise ValueError("Session ID must contain only alphanumeric characters, underscores, and hyphens")
+            # 会话ID必须只包含字母数字字符、下划线和连字符
@@ -1,5 +1,5 @@
 """This file contains the services for the application."""
 
-from app.services.database import database_service
+from app.services.database import get_database_service
 
-__all__ = ["database_service"]
+__all__ = ["get_database_service"]
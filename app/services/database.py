@@ -4,17 +4,28 @@
 from typing import (
     List,
     Optional,
+    Tuple,
 )
 
+from cachetools import TTLCache
 from fastapi import HTTPException
+from sqlalchemy import (
+    delete,
+    event,
+    insert,
+)
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import (
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import selectinload
 from sqlmodel import (
-    Session,
     SQLModel,
-    create_engine,
     select,
+    update,
 )
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import (
     Environment,
@@ -25,42 +36,105 @@ from app.models.session import Session as ChatSession
 from app.models.user import User
 
 
+def _async_database_url(url: str) -> str:
+    """Rewrite a PostgreSQL URL to use the asyncpg driver.
+
+    Args:
+        url: The configured database URL.
+
+    Returns:
+        str: The URL with the asyncpg driver scheme.
+    """
+    """将PostgreSQL连接URL改写为使用asyncpg驱动。
+
+    参数：
+        url: 配置的数据库URL
+
+    返回：
+        str: 使用asyncpg驱动方案的URL
+    """
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
 class DatabaseService:
     """Service class for database operations.
 
     This class handles all database operations for Users, Sessions, and Messages.
-    It uses SQLModel for ORM operations and maintains a connection pool.
+    It uses SQLModel for ORM operations over an async engine (asyncpg), so DB I/O
+    never blocks the event loop and concurrent requests interleave freely.
     """
     """数据库操作服务类。
 
     该类处理所有与用户、会话和消息相关的数据库操作。
-    使用SQLModel进行ORM操作并维护连接池。
+    基于异步引擎（asyncpg）使用SQLModel进行ORM操作，数据库I/O不会阻塞
+    事件循环，并发请求可以自由交错执行。
     """
 
     def __init__(self):
-        """Initialize database service with connection pool."""
-        """使用连接池初始化数据库服务。"""
+        """Initialize database service with an async connection pool."""
+        """使用异步连接池初始化数据库服务。"""
         try:
             # Configure environment-specific database connection pool settings
             # 配置特定环境的数据库连接池设置
             pool_size = settings.POSTGRES_POOL_SIZE
             max_overflow = settings.POSTGRES_MAX_OVERFLOW
 
-            # Create engine with appropriate pool configuration
-            # 使用适当的池配置创建数据库引擎
-            self.engine = create_engine(
-                settings.POSTGRES_URL,
+            # Create async engine with appropriate pool configuration
+            # 使用适当的池配置创建异步数据库引擎
+            self.engine = create_async_engine(
+                _async_database_url(settings.POSTGRES_URL),
                 pool_pre_ping=True,
-                poolclass=QueuePool,
                 pool_size=pool_size,
                 max_overflow=max_overflow,
                 pool_timeout=30,  # Connection timeout (seconds) 连接超时（秒）
                 pool_recycle=1800,  # Recycle connections after 30 minutes 30分钟后回收连接
+                pool_use_lifo=True,  # Reuse hot connections first 优先复用最近使用的连接
+                # Dedicated compiled-SQL cache: repeat executions of the same
+                # statement skip the compile step entirely.
+                # 专用的SQL编译缓存：同一语句的重复执行完全跳过编译步骤。
+                execution_options={"compiled_cache": {}},
+                # asyncpg keeps server-side prepared statements per connection
+                # asyncpg在每个连接上保留服务端预备语句
+                connect_args={"prepared_statement_cache_size": 256},
             )
 
-            # Create tables (only if they don't exist)
-            # 创建数据表（仅当表不存在时）
-            SQLModel.metadata.create_all(self.engine)
+            # Single shared session factory: binding/event resolution happens once
+            # here instead of on every per-call Session construction.
+            # 共享的会话工厂：绑定与事件解析在此一次完成，
+            # 而不是在每次调用构造Session时重复执行。
+            self.SessionLocal = async_sessionmaker(
+                self.engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autoflush=False,
+            )
+
+            # Short-TTL read caches for user lookups: auth dependencies hit
+            # get_user on every request while the row rarely changes. Writes
+            # go through (create populates, delete evicts), and the TTL bounds
+            # staleness for out-of-band changes.
+            # 用户查询的短TTL读缓存：认证依赖在每个请求上调用get_user，
+            # 而该行数据极少变化。写操作直写（创建填充、删除清除），
+            # TTL限制带外修改的过期窗口。
+            self._user_by_id: TTLCache = TTLCache(maxsize=4096, ttl=60)
+            self._user_by_email: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+            # Mapper-level invalidation: any ORM flush that inserts, updates
+            # or deletes a User evicts its cache entries, so new mutation
+            # paths stay correct without remembering to pop() manually.
+            # (Core statements bypass these hooks; delete_user_by_email keeps
+            # its explicit eviction for that reason.)
+            # 映射器级失效：任何插入、更新或删除User的ORM flush都会清除其
+            # 缓存条目，新增的写路径无需记得手动pop()即保持正确。
+            # （Core语句不触发这些钩子，因此delete_user_by_email保留显式清除。）
+            def _evict_user(mapper, connection, target) -> None:
+                self._user_by_id.pop(target.id, None)
+                self._user_by_email.pop(target.email, None)
+
+            for hook in ("after_insert", "after_update", "after_delete"):
+                event.listen(User, hook, _evict_user)
 
             logger.info(
                 "database_initialized",
@@ -75,6 +149,20 @@ class DatabaseService:
             if settings.ENVIRONMENT != Environment.PRODUCTION:
                 raise
 
+    async def create_tables(self) -> None:
+        """Create database tables if they don't exist.
+
+        The async engine cannot run DDL during __init__, so table creation is
+        invoked explicitly from application startup.
+        """
+        """创建数据表（仅当表不存在时）。
+
+        异步引擎无法在__init__中执行DDL，建表由应用启动流程显式调用。
+        """
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        logger.info("database_tables_created", environment=settings.ENVIRONMENT.value)
+
     async def create_user(self, email: str, password: str) -> User:
         """Create a new user.
 
@@ -94,11 +182,13 @@ class DatabaseService:
         返回：
             User: 创建的用户对象
         """
-        with Session(self.engine) as session:
+        async with self.SessionLocal() as session:
             user = User(email=email, hashed_password=password)
             session.add(user)
-            session.commit()
-            session.refresh(user)
+            await session.commit()
+            await session.refresh(user)
+            self._user_by_id[user.id] = user
+            self._user_by_email[user.email] = user
             logger.info("user_created", email=email)
             return user
 
@@ -119,8 +209,15 @@ class DatabaseService:
         返回：
             Optional[User]: 如果找到则返回用户对象，否则返回None
         """
-        with Session(self.engine) as session:
-            user = session.get(User, user_id)
+        cached = self._user_by_id.get(user_id)
+        if cached is not None:
+            return cached
+
+        async with self.SessionLocal() as session:
+            user = await session.get(User, user_id)
+            if user is not None:
+                self._user_by_id[user.id] = user
+                self._user_by_email[user.email] = user
             return user
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
@@ -140,9 +237,18 @@ class DatabaseService:
         返回：
             Optional[User]: 如果找到则返回用户对象，否则返回None
         """
-        with Session(self.engine) as session:
-            statement = select(User).where(User.email == email)
-            user = session.exec(statement).first()
+        cached = self._user_by_email.get(email)
+        if cached is not None:
+            return cached
+
+        async with self.SessionLocal() as session:
+            # Explicit LIMIT 1 short-circuits row production server-side
+            # 显式LIMIT 1让服务端在产出首行后立即停止
+            statement = select(User).where(User.email == email).limit(1)
+            user = (await session.exec(statement)).first()
+            if user is not None:
+                self._user_by_id[user.id] = user
+                self._user_by_email[user.email] = user
             return user
 
     async def delete_user_by_email(self, email: str) -> bool:
@@ -162,13 +268,19 @@ class DatabaseService:
         返回：
             bool: 如果删除成功返回True，如果用户未找到返回False
         """
-        with Session(self.engine) as session:
-            user = session.exec(select(User).where(User.email == email)).first()
-            if not user:
+        async with self.SessionLocal() as session:
+            # Single DELETE ... RETURNING settles existence and removal in one
+            # round trip without hydrating the ORM object.
+            # 单条DELETE ... RETURNING一次往返同时完成存在性判断与删除，
+            # 无需加载ORM对象。
+            statement = delete(User).where(User.email == email).returning(User.id)
+            deleted_id = (await session.execute(statement)).scalar_one_or_none()
+            await session.commit()
+            if deleted_id is None:
                 return False
 
-            session.delete(user)
-            session.commit()
+            self._user_by_id.pop(deleted_id, None)
+            self._user_by_email.pop(email, None)
             logger.info("user_deleted", email=email)
             return True
 
@@ -193,14 +305,49 @@ class DatabaseService:
         返回：
             ChatSession: 创建的会话对象
         """
-        with Session(self.engine) as session:
+        async with self.SessionLocal() as session:
             chat_session = ChatSession(id=session_id, user_id=user_id, name=name)
             session.add(chat_session)
-            session.commit()
-            session.refresh(chat_session)
+            await session.commit()
+            await session.refresh(chat_session)
             logger.info("session_created", session_id=session_id, user_id=user_id, name=name)
             return chat_session
 
+    async def bulk_create_sessions(self, rows: List[dict]) -> List[ChatSession]:
+        """Create multiple chat sessions in a single round trip.
+
+        A single INSERT ... RETURNING with a values list replaces one
+        commit round trip per session (the N+1 insert pattern), which
+        matters for bulk imports and background jobs.
+
+        Args:
+            rows: Session columns per row, e.g. {"id": ..., "user_id": ..., "name": ...}
+
+        Returns:
+            List[ChatSession]: The created sessions, in input order
+        """
+        """在一次往返中批量创建聊天会话。
+
+        一条带values列表的INSERT ... RETURNING取代每个会话一次的提交往返
+        （即N+1插入模式），对批量导入和后台任务尤为重要。
+
+        参数：
+            rows: 每行的会话字段，例如 {"id": ..., "user_id": ..., "name": ...}
+
+        返回：
+            List[ChatSession]: 按输入顺序创建的会话列表
+        """
+        if not rows:
+            return []
+
+        async with self.SessionLocal() as session:
+            statement = insert(ChatSession).values(rows).returning(ChatSession)
+            result = await session.execute(statement)
+            await session.commit()
+            sessions = result.scalars().all()
+            logger.info("sessions_bulk_created", count=len(sessions))
+            return sessions
+
     async def get_session(self, session_id: str) -> Optional[ChatSession]:
         """Get a session by ID.
 
@@ -218,10 +365,36 @@ class DatabaseService:
         返回：
             Optional[ChatSession]: 如果找到则返回会话对象，否则返回None
         """
-        with Session(self.engine) as session:
-            chat_session = session.get(ChatSession, session_id)
+        async with self.SessionLocal() as session:
+            chat_session = await session.get(ChatSession, session_id)
             return chat_session
 
+    async def get_session_with_user(self, session_id: str) -> Optional[Tuple[ChatSession, User]]:
+        """Get a session together with its owning user in a single query.
+
+        Args:
+            session_id: The ID of the session to retrieve
+
+        Returns:
+            Optional[Tuple[ChatSession, User]]: The session and its user if found, None otherwise
+        """
+        """通过一次联表查询同时获取会话及其所属用户。
+
+        参数：
+            session_id: 要检索的会话ID
+
+        返回：
+            Optional[Tuple[ChatSession, User]]: 如果找到则返回会话和用户，否则返回None
+        """
+        async with self.SessionLocal() as session:
+            statement = (
+                select(ChatSession, User)
+                .join(User, User.id == ChatSession.user_id)
+                .where(ChatSession.id == session_id)
+            )
+            row = (await session.exec(statement)).first()
+            return row
+
     async def get_user_sessions(self, user_id: int) -> List[ChatSession]:
         """Get all sessions for a user.
 
@@ -239,9 +412,20 @@ class DatabaseService:
         返回：
             List[ChatSession]: 用户的会话列表
         """
-        with Session(self.engine) as session:
-            statement = select(ChatSession).where(ChatSession.user_id == user_id).order_by(ChatSession.created_at)
-            sessions = session.exec(statement).all()
+        async with self.SessionLocal() as session:
+            # selectinload preloads the owning user in one IN(...) query, so
+            # callers touching session.user neither trigger one lazy SELECT
+            # per row nor hit the async lazy-load restriction.
+            # selectinload用一条IN(...)查询预加载所属用户，调用方访问
+            # session.user时既不会逐行触发懒加载SELECT，也不会碰到
+            # 异步会话禁止懒加载的限制。
+            statement = (
+                select(ChatSession)
+                .where(ChatSession.user_id == user_id)
+                .options(selectinload(ChatSession.user))
+                .order_by(ChatSession.created_at)
+            )
+            sessions = (await session.exec(statement)).all()
             return sessions
 
     async def update_session_name(self, session_id: str, name: str) -> ChatSession:
@@ -269,15 +453,19 @@ class DatabaseService:
         异常：
             HTTPException: 如果会话未找到
         """
-        with Session(self.engine) as session:
-            chat_session = session.get(ChatSession, session_id)
-            if not chat_session:
+        async with self.SessionLocal() as session:
+            # Single UPDATE ... RETURNING round trip instead of SELECT,
+            # UPDATE and refresh.
+            # 单条UPDATE ... RETURNING往返，取代SELECT、UPDATE加refresh。
+            statement = (
+                update(ChatSession).where(ChatSession.id == session_id).values(name=name).returning(ChatSession)
+            )
+            result = await session.execute(statement)
+            chat_session = result.scalar_one_or_none()
+            if chat_session is None:
                 raise HTTPException(status_code=404, detail="Session not found")
 
-            chat_session.name = name
-            session.add(chat_session)
-            session.commit()
-            session.refresh(chat_session)
+            await session.commit()
             logger.info("session_name_updated", session_id=session_id, name=name)
             return chat_session
 
@@ -285,14 +473,14 @@ class DatabaseService:
         """Get a session maker for creating database sessions.
 
         Returns:
-            Session: A SQLModel session maker
+            async_sessionmaker: The shared async session factory
         """
         """获取用于创建数据库会话的会话创建器。
 
         返回：
-            Session: SQLModel会话创建器
+            async_sessionmaker: 共享的异步会话工厂
         """
-        return Session(self.engine)
+        return self.SessionLocal
 
     async def health_check(self) -> bool:
         """Check database connection health.
@@ -306,16 +494,35 @@ class DatabaseService:
             bool: 如果数据库健康则返回True，否则返回False
         """
         try:
-            with Session(self.engine) as session:
-                # Execute a simple query to check connection
-                # 执行简单查询以检查连接
-                session.exec(select(1)).first()
+            async with self.SessionLocal() as session:
+                # Execute a simple query to check connection; scalar skips
+                # client-side row-tuple construction.
+                # 执行简单查询以检查连接；scalar跳过客户端行元组的构造。
+                await session.scalar(select(1))
                 return True
         except Exception as e:
             logger.error("database_health_check_failed", error=str(e))
             return False
 
 
-# Create a singleton instance
-# 创建单例实例
-database_service = DatabaseService()
+# Lazily-constructed singleton: nothing touches the database at import time,
+# so each worker builds the engine only when the service is first needed.
+# 惰性构造的单例：导入时不触碰数据库，每个worker在首次需要时才构建引擎。
+_database_service: Optional[DatabaseService] = None
+
+
+def get_database_service() -> DatabaseService:
+    """Get the shared database service, constructing it on first use.
+
+    Returns:
+        DatabaseService: The process-wide database service
+    """
+    """获取共享的数据库服务，首次使用时构造。
+
+    返回:
+        DatabaseService: 进程内共享的数据库服务
+    """
+    global _database_service
+    if _database_service is None:
+        _database_service = DatabaseService()
+    return _database_service
@@ -2,7 +2,8 @@
 
 from .graph import (
     dump_messages,
+    dump_mixed_messages,
     prepare_messages,
 )
 
-__all__ = ["dump_messages", "prepare_messages"]
+__all__ = ["dump_messages", "dump_mixed_messages", "prepare_messages"]
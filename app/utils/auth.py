@@ -1,14 +1,19 @@
 """This file contains the authentication utilities for the application."""
 """此文件包含应用程序的认证工具。"""
 
-import re
+import hashlib
+import uuid
 from datetime import (
     UTC,
     datetime,
     timedelta,
 )
-from typing import Optional
+from typing import (
+    Optional,
+    Union,
+)
 
+from cachetools import TTLCache
 from jose import (
     JWTError,
     jwt,
@@ -17,14 +22,22 @@ from jose import (
 from app.core.config import settings
 from app.core.logging import logger
 from app.schemas.auth import Token
-from app.utils.sanitization import sanitize_string
 
+# 允许的JWT最大长度（本应用签发的令牌远小于此值）
+_MAX_JWT_LEN = 4096
+
+# Bounded TTL cache for verified tokens, keyed by SHA-256 of the token (never the raw token).
+# The short TTL bounds the blast radius if a token needs to be revoked.
+# 已验证令牌的有界TTL缓存，键为令牌的SHA-256哈希（绝不缓存原始令牌）。
+# 较短的TTL限制了令牌需要撤销时的影响范围。
+_verified_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=5)
 
-def create_access_token(thread_id: str, expires_delta: Optional[timedelta] = None) -> Token:
+
+def create_access_token(thread_id: Union[str, int], expires_delta: Optional[timedelta] = None) -> Token:
     """Create a new access token for a thread.
 
     Args:
-        thread_id: The unique thread ID for the conversation.
+        thread_id: The unique thread ID for the conversation (stringified at encode).
         expires_delta: Optional expiration time delta.
 
     Returns:
@@ -39,17 +52,22 @@ def create_access_token(thread_id: str, expires_delta: Optional[timedelta] = Non
     返回:
         Token: 生成的访问令牌。
     """
+    # 只读一次时钟，expire与iat共享同一时间戳
+    now = datetime.now(UTC)
     if expires_delta:
-        expire = datetime.now(UTC) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(UTC) + timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS)
+        expire = now + timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS)
+
+    # JWT的sub声明必须是字符串，仅在编码时转换一次
+    thread_id = str(thread_id)
 
     # 准备要编码的数据
     to_encode = {
         "sub": thread_id,  # 主题（用户标识）
         "exp": expire,     # 过期时间
-        "iat": datetime.now(UTC),  # 签发时间
-        "jti": sanitize_string(f"{thread_id}-{datetime.now(UTC).timestamp()}"),  # 添加唯一令牌标识符
+        "iat": now,        # 签发时间
+        "jti": uuid.uuid4().hex,  # 唯一令牌标识符（仅参与签名，无需HTML转义）
     }
 
     # 使用JWT算法编码令牌
@@ -60,25 +78,88 @@ def create_access_token(thread_id: str, expires_delta: Optional[timedelta] = Non
     return Token(access_token=encoded_jwt, expires_at=expire)
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the thread ID.
+def create_access_tokens(thread_ids: list[str], expires_delta: Optional[timedelta] = None) -> list[Token]:
+    """Create access tokens for a batch of threads.
+
+    Shares a single clock read, expiry and claims template across the batch,
+    so only the per-subject signing remains inside the loop, and emits one
+    log event for the whole batch instead of one per token.
+
+    Args:
+        thread_ids: The unique thread IDs to create tokens for.
+        expires_delta: Optional expiration time delta applied to all tokens.
+
+    Returns:
+        list[Token]: The generated access tokens, in input order.
+    """
+    """为一批会话批量创建访问令牌。
+
+    整批共享同一次时钟读取、过期时间和声明模板，循环内只保留每个主题的
+    签名操作，并且整批只记录一条日志，而不是每个令牌一条。
+
+    参数:
+        thread_ids: 要创建令牌的会话线程ID列表。
+        expires_delta: 应用于所有令牌的可选过期时间增量。
+
+    返回:
+        list[Token]: 按输入顺序生成的访问令牌列表。
+    """
+    now = datetime.now(UTC)
+    if expires_delta:
+        expire = now + expires_delta
+    else:
+        expire = now + timedelta(days=settings.JWT_ACCESS_TOKEN_EXPIRE_DAYS)
+
+    tokens = []
+    for thread_id in thread_ids:
+        to_encode = {
+            "sub": thread_id,
+            "exp": expire,
+            "iat": now,
+            "jti": uuid.uuid4().hex,
+        }
+        encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        tokens.append(Token(access_token=encoded_jwt, expires_at=expire))
+
+    logger.info("tokens_created", count=len(tokens), expires_at=expire.isoformat())
+
+    return tokens
+
+
+def verify_token(token: str) -> Optional[Union[str, int]]:
+    """Verify a JWT token and return the thread ID, caching verified tokens.
+
+    Signature verification is compute-bound crypto work that dominates the cost
+    of authenticated requests at high RPS; repeated presentations of the same
+    token are served from the cache instead of re-running `jwt.decode`. Numeric
+    subjects (user IDs) are parsed to int once at cache-fill time, so cache
+    hits skip the per-request string-to-int round-trip as well. A cached entry
+    is honored only while the token's own exp claim allows it.
 
     Args:
         token: The JWT token to verify.
 
     Returns:
-        Optional[str]: The thread ID if token is valid, None otherwise.
+        Optional[Union[str, int]]: The thread ID (int for numeric user IDs,
+            str for session UUIDs) if token is valid, None otherwise.
 
     Raises:
         ValueError: If the token format is invalid
     """
-    """验证JWT令牌并返回线程ID。
+    """验证JWT令牌并返回线程ID，成功的验证结果会被缓存。
+
+    签名验证是计算密集型的加密操作，在高并发下是认证请求的主要开销；
+    同一令牌的重复请求将直接命中缓存，而无需重新执行 `jwt.decode`。
+    数字主题（用户ID）在填充缓存时解析为int一次，缓存命中时无需再做
+    每请求的字符串与整数转换。缓存条目仅在令牌自身exp声明允许的
+    时间内有效。
 
     参数:
         token: 要验证的JWT令牌。
 
     返回:
-        Optional[str]: 如果令牌有效则返回线程ID，否则返回None。
+        Optional[Union[str, int]]: 如果令牌有效则返回线程ID
+            （数字用户ID为int，会话UUID为str），否则返回None。
 
     异常:
         ValueError: 如果令牌格式无效
@@ -87,21 +168,36 @@ def verify_token(token: str) -> Optional[str]:
         logger.warning("token_invalid_format")
         raise ValueError("Token must be a non-empty string")
 
-    # 在尝试解码之前进行基本格式验证
-    # JWT令牌由3个用点分隔的base64url编码段组成
-    if not re.match(r"^[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+$", token):
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _verified_token_cache.get(key)
+    if cached is not None:
+        thread_id, token_exp = cached
+        # 令牌自身的过期时间优先于缓存TTL
+        if token_exp is None or token_exp > datetime.now(UTC).timestamp():
+            return thread_id
+        _verified_token_cache.pop(key, None)
+
+    # 在尝试解码之前进行基本格式验证：JWT由3个用点分隔的段组成。
+    # str.count是C层的紧凑循环，比正则状态机更快地拒绝畸形令牌；
+    # 字符集层面的校验交由jwt.decode的base64解码完成
+    if token.count(".") != 2 or len(token) > _MAX_JWT_LEN:
         logger.warning("token_suspicious_format")
         raise ValueError("Token format is invalid - expected JWT format")
 
     try:
         # 解码并验证令牌
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        thread_id: str = payload.get("sub")
+        thread_id = payload.get("sub")
         if thread_id is None:
             logger.warning("token_missing_thread_id")
             return None
 
         logger.info("token_verified", thread_id=thread_id)
+
+        # 数字主题（用户ID）在此解析一次，缓存命中时直接返回int
+        if thread_id.isdigit():
+            thread_id = int(thread_id)
+        _verified_token_cache[key] = (thread_id, payload.get("exp"))
         return thread_id
 
     except JWTError as e:
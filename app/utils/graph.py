@@ -1,12 +1,22 @@
 """This file contains the graph utilities for the application."""
 """此文件包含应用程序的图工具函数。"""
 
+from cachetools import LRUCache
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import trim_messages as _trim_messages
+from pydantic import TypeAdapter
 
 from app.core.config import settings
 from app.schemas import Message
 
+# 整表序列化适配器：一次进入pydantic-core完成整个列表的转换，
+# 而不是每条消息各进一次model_dump
+_MESSAGE_LIST_ADAPTER = TypeAdapter(list[Message])
+
+# 裁剪结果的记忆化缓存：token计数器要对每条历史消息跑一遍分词器，
+# 对于未变化的(消息序列, 提示词, 模型)组合，裁剪输出是确定性的
+_prepared_cache: LRUCache = LRUCache(maxsize=1024)
+
 
 def dump_messages(messages: list[Message]) -> list[dict]:
     """Dump the messages to a list of dictionaries.
@@ -22,6 +32,36 @@ def dump_messages(messages: list[Message]) -> list[dict]:
     参数:
         messages (list[Message]): 需要转换的消息列表。
 
+    返回:
+        list[dict]: 转换后的消息字典列表。
+    """
+    return _MESSAGE_LIST_ADAPTER.dump_python(messages)
+
+
+def dump_mixed_messages(messages: list) -> list[dict]:
+    """Dump a graph-internal message list that may mix schema and LangChain messages.
+
+    The bulk ``TypeAdapter`` path assumes homogeneous schema ``Message`` items;
+    lists coming out of the graph state mix those with LangChain messages, which
+    the adapter would serialize via its duck-typed fallback (emitting serializer
+    warnings and ``type`` instead of ``role`` keys). Per-item ``model_dump`` lets
+    each message serialize through its own model.
+
+    Args:
+        messages (list): The messages to dump.
+
+    Returns:
+        list[dict]: The dumped messages.
+    """
+    """转换可能混合schema消息与LangChain消息的图内部消息列表。
+
+    整表TypeAdapter路径假定列表全部为schema的Message；图状态产出的列表
+    会混入LangChain消息，适配器只能用鸭子类型回退序列化（触发序列化警告，
+    且输出type键而非role键）。逐条model_dump让每条消息走自己模型的序列化。
+
+    参数:
+        messages (list): 需要转换的消息列表。
+
     返回:
         list[dict]: 转换后的消息字典列表。
     """
@@ -49,9 +89,23 @@ def prepare_messages(messages: list[Message], llm: BaseChatModel, system_prompt:
     返回:
         list[Message]: 处理后的消息列表。
     """
+    # 缓存键：消息序列内容、提示词、token上限与模型共同决定裁剪结果
+    # （状态里的LangChain消息暴露的是.type而非.role，两者皆兼容）
+    cache_key = (
+        tuple((getattr(message, "role", None) or message.type, message.content) for message in messages),
+        system_prompt,
+        settings.MAX_TOKENS,
+        getattr(llm, "model_name", None),
+    )
+    cached = _prepared_cache.get(cache_key)
+    if cached is not None:
+        # 浅拷贝防止调用方修改缓存内容
+        return list(cached)
+
     # 使用语言模型的token计数器来裁剪消息
+    # （输入可能是图状态里的LangChain消息，需走逐条转换路径）
     trimmed_messages = _trim_messages(
-        dump_messages(messages),
+        dump_mixed_messages(messages),
         strategy="last",  # 从最后开始裁剪
         token_counter=llm,  # 使用语言模型的token计数器
         max_tokens=settings.MAX_TOKENS,  # 最大token数
@@ -60,4 +114,6 @@ def prepare_messages(messages: list[Message], llm: BaseChatModel, system_prompt:
         allow_partial=False,  # 不允许部分消息
     )
     # 在裁剪后的消息前添加系统提示词
-    return [Message(role="system", content=system_prompt)] + trimmed_messages
+    prepared = [Message(role="system", content=system_prompt)] + trimmed_messages
+    _prepared_cache[cache_key] = prepared
+    return list(prepared)